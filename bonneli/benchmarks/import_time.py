@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Cold-import benchmark for the vc service, based on ``python -X importtime``.
+
+Imports the module in a fresh interpreter (from an empty temporary directory,
+so nothing is written next to the code), takes the best of ``--runs``, and
+prints the total plus the most expensive top-level packages. Modules listed
+in ``--forbid`` must not be imported at all; with ``--max-ms`` the script
+exits non-zero when the import is slower, so it can guard CI or image builds.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module web_app --max-ms 1500
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+VC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "vc")
+DEFAULT_FORBIDDEN = ("pandas", "bs4", "slugify")
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> Tuple[int, Dict[str, int], List[str]]:
+    """Return ``(total_us, cumulative_us_per_top_level_package, imported_modules)``."""
+    code = f"import sys; sys.path.insert(0, {os.path.abspath(VC_DIR)!r}); import {module}"
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    total = 0
+    packages: Dict[str, int] = defaultdict(int)
+    modules: List[str] = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        modules.append(name)
+        if name == module:
+            total = cumulative
+        elif indent <= 3:  # roots of the import tree and their direct imports
+            packages[name.split(".")[0]] += cumulative
+    return total, dict(packages), modules
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the vc service.")
+    parser.add_argument("--module", default="app", help="Module in vc/ to import (default: %(default)s).")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to try; best is reported.")
+    parser.add_argument("--top", type=int, default=10, help="Top-level packages to list (default: %(default)s).")
+    parser.add_argument("--max-ms", type=float, help="Fail when the best import takes longer than this.")
+    parser.add_argument(
+        "--forbid",
+        default=",".join(DEFAULT_FORBIDDEN),
+        help="Comma-separated modules that must stay lazy (default: %(default)s; empty to disable).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    best: Optional[Tuple[int, Dict[str, int], List[str]]] = None
+    for _ in range(max(args.runs, 1)):
+        result = measure(args.module)
+        if best is None or result[0] < best[0]:
+            best = result
+    total, packages, modules = best
+    print(f"import {args.module}: {total / 1000:.1f} ms (best of {max(args.runs, 1)})")
+    for name, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    status = 0
+    forbidden = [name.strip() for name in args.forbid.split(",") if name.strip()]
+    loaded = sorted({name for name in forbidden if name in modules})
+    if loaded:
+        print(f"FAIL: eagerly imported: {', '.join(loaded)}", file=sys.stderr)
+        status = 1
+    if args.max_ms is not None and total / 1000 > args.max_ms:
+        print(f"FAIL: {total / 1000:.1f} ms > --max-ms {args.max_ms}", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
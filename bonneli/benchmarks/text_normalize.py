@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for shared/text_normalize.py against the old inline helpers.
+
+The inputs mimic a scrape: a few hundred distinct strings repeated many
+times. ``uncached`` calls the functions behind the LRU caches (only the
+precompiled patterns and the hand-written date parser help), ``cold`` starts
+every pass with empty caches and ``warm`` keeps them filled.
+
+    python benchmarks/text_normalize.py --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+import unicodedata
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+import text_normalize as tn  # noqa: E402
+
+
+# --- stare verzije (kopije iz app.py / bonneli_scrape.py / RSS skripti pre zajedničkog modula) ---
+
+def old_clean_text(x):
+    if x is None:
+        return None
+    return re.sub(r"\s+", " ", x).strip()
+
+
+def old_normalize(text):
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
+
+
+def old_normalize_space(text):
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def old_normalize_tag_label(raw_label):
+    label = old_normalize_space(raw_label).strip(" :")
+    if not label:
+        return None
+    label = label.replace("°", "").replace("º", "")
+    label = "".join(ch for ch in unicodedata.normalize("NFKD", label) if not unicodedata.combining(ch))
+    label = old_normalize_space(label)
+    lower = label.lower()
+    if lower in {"n", "no", "numero", "num"}:
+        return "Broj"
+    if lower == "uscita":
+        return "Uscita"
+    if lower == "periodicita":
+        return "Periodicita"
+    if lower == "prezzo":
+        return "Prezzo"
+    return label
+
+
+def old_normalize_issue_number(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if value.isdigit():
+        number = int(value)
+        if number == 0:
+            return None
+        return str(number)
+    return value
+
+
+def old_parse_title_and_broj(raw_title):
+    if not raw_title:
+        return "", None
+    m = re.search(r'(?:(?:br\.?|#)\s*)?(\d{1,4})(?=[^\d]|$)', raw_title, flags=re.IGNORECASE)
+    m = re.search(r'(?<![%\-])\s*(?:br\.?|#)?\s*(\d{1,4})(?=[^\d]|$)', raw_title, flags=re.IGNORECASE)
+    broj = old_normalize_issue_number(m.group(1)) if m else None
+    return raw_title.strip(), broj
+
+
+def old_try_parse_date(s):
+    s = (s or "").strip().strip(".")
+    s = re.sub(r"\s+", "", s)
+    for fmt in ("%d.%m.%Y", "%d.%m.%Y.", "%Y-%m-%d", "%d.%m.%y"):
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+# --- ulazi ---
+
+def build_inputs(distinct: int, total: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    series = ["Zagor", "Martin Mystère", "Dylan Dog", "Nathan Never", "Tex Willer", "Dragonero"]
+    titles = [f"{rng.choice(series)} #{n} – Priča  broj {n}  " for n in range(1, distinct + 1)]
+    dates = [f"{rng.randint(1, 28)}. {rng.randint(1, 12)}. {rng.randint(1990, 2025)}." for _ in range(distinct)]
+    labels = ["N°", "Uscita:", "Periodicità", "Prezzo :", "Formato", "Colore", "Pagine"]
+
+    def spread(values: List[str]) -> List[str]:
+        return [rng.choice(values) for _ in range(total)]
+
+    return {"titles": spread(titles), "dates": spread(dates), "labels": spread(labels)}
+
+
+def bench(func: Callable, values: Sequence[str], repeat: int, clear: Optional[Callable] = None) -> float:
+    def run():
+        if clear:
+            clear()
+        for value in values:
+            func(value)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare old and shared text normalization helpers.")
+    parser.add_argument("--distinct", type=int, default=300, help="Distinct strings per kind.")
+    parser.add_argument("--total", type=int, default=20000, help="Calls per kind and pass.")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes; the best one is reported.")
+    args = parser.parse_args(argv)
+
+    inputs = build_inputs(args.distinct, args.total)
+    cases = [
+        ("clean_text", old_clean_text, tn.clean_text, "titles"),
+        ("_normalize/fold_text", old_normalize, tn.fold_text, "titles"),
+        ("normalize_tag_label", old_normalize_tag_label, tn.normalize_tag_label, "labels"),
+        ("parse_title_and_broj", old_parse_title_and_broj, tn.parse_title_and_broj, "titles"),
+        ("try_parse_date", old_try_parse_date, tn.try_parse_date, "dates"),
+    ]
+    caches = [tn.strip_accents, tn.fold_text, tn.normalize_tag_label, tn.normalize_issue_number,
+              tn.parse_title_and_broj, tn.try_parse_date]
+
+    def clear_caches():
+        for cached in caches:
+            cached.cache_clear()
+
+    print(f"{args.total} calls over {args.distinct} distinct strings, best of {args.repeat} (ms)")
+    print(f"{'helper':<24}{'old':>10}{'uncached':>10}{'cold':>10}{'warm':>10}{'speedup':>10}")
+    for name, old, new, kind in cases:
+        values = inputs[kind]
+        for value in values[:50]:
+            assert old(value) == new(value), (name, value)
+        old_time = bench(old, values, args.repeat)
+        uncached_time = bench(getattr(new, "__wrapped__", new), values, args.repeat)
+        cold_time = bench(new, values, args.repeat, clear=clear_caches)
+        warm_time = bench(new, values, args.repeat)
+        print(
+            f"{name:<24}{old_time * 1000:>10.1f}{uncached_time * 1000:>10.1f}"
+            f"{cold_time * 1000:>10.1f}{warm_time * 1000:>10.1f}"
+            f"{old_time / warm_time:>9.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
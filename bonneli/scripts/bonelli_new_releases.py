@@ -4,19 +4,35 @@
 from __future__ import annotations
 
 import argparse
-import csv
-import json
 import os
 import sys
-import unicodedata
 import warnings
-import urllib.error
-import urllib.request
-import xml.etree.ElementTree as ET
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from email.utils import parsedate_to_datetime
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from feed_watch import (  # noqa: E402
+    DEFAULT_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    run_watch,
+)
+from http_client import HttpClient  # noqa: E402
+from release_history import history_main, record_history  # noqa: E402
+from release_feeds import (  # noqa: E402
+    DEFAULT_HEDGE_DELAY,
+    FeedState,
+    build_series_matchers,
+    fetch_feed,
+    format_releases_text,
+    latest_cutoff,
+    load_feed_state,
+    load_releases,
+    parse_cutoff,
+    releases_to_json,
+    save_feed_state,
+    unreported_releases,
+    write_releases_csv,
+)
 
 warnings.filterwarnings(
     "ignore",
@@ -35,6 +51,12 @@ DEFAULT_FEED_CANDIDATES: Tuple[str, ...] = (
 DEFAULT_FEED_URL = DEFAULT_FEED_CANDIDATES[0]
 DEFAULT_TIMEOUT = 15
 
+FEED_CLIENT = HttpClient(
+    headers={"User-Agent": "bonelli-new-releases/1.0 (+https://github.com/)"},
+    timeout=DEFAULT_TIMEOUT,
+    retries=1,  # mirrors in DEFAULT_FEED_CANDIDATES are the real fallback
+)
+
 # Map display name -> tuple of match keywords (normalized to ASCII, lowercase)
 DEFAULT_SERIES: Dict[str, Tuple[str, ...]] = {
     "Dylan Dog": ("dylan dog",),
@@ -43,164 +65,6 @@ DEFAULT_SERIES: Dict[str, Tuple[str, ...]] = {
 }
 
 
-@dataclass
-class Release:
-    series: str
-    title: str
-    link: str
-    published: Optional[datetime]
-
-
-def _normalize(text: str) -> str:
-    """Lowercase ASCII approximation for consistent string matching."""
-    normalized = unicodedata.normalize("NFKD", text)
-    return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
-
-
-def fetch_feed(
-    url: str,
-    timeout: int = DEFAULT_TIMEOUT,
-    fallbacks: Sequence[str] = (),
-) -> bytes:
-    errors: List[str] = []
-    for candidate in (url, *fallbacks):
-        request = urllib.request.Request(
-            candidate,
-            headers={
-                "User-Agent": "bonelli-new-releases/1.0 (+https://github.com/)",
-            },
-        )
-        try:
-            with urllib.request.urlopen(request, timeout=timeout) as response:
-                return response.read()
-        except urllib.error.HTTPError as err:
-            errors.append(
-                f"{candidate} -> HTTP {err.code} {err.reason or ''}".rstrip()
-            )
-        except Exception as exc:
-            errors.append(f"{candidate} -> {exc}")
-    raise RuntimeError("All feed URLs failed:\n" + "\n".join(errors))
-
-
-def parse_feed(feed_xml: bytes) -> Iterable[ET.Element]:
-    root = ET.fromstring(feed_xml)
-    channel = root.find("channel")
-    if channel is None:
-        return []
-    return channel.findall("item")
-
-
-def extract_release(
-    item: ET.Element,
-    series_matchers: Dict[str, Tuple[str, ...]],
-) -> Optional[Release]:
-    title_elem = item.findtext("title") or ""
-    link_elem = item.findtext("link") or ""
-    pub_date_raw = item.findtext("pubDate")
-    published = None
-    if pub_date_raw:
-        try:
-            published = parsedate_to_datetime(pub_date_raw)
-        except (TypeError, ValueError):
-            published = None
-
-    normalized_title = _normalize(title_elem)
-    for series_name, keywords in series_matchers.items():
-        if any(keyword in normalized_title for keyword in keywords):
-            return Release(series=series_name, title=title_elem.strip(), link=link_elem.strip(), published=published)
-    return None
-
-
-def load_releases(feed_xml: bytes, series_matchers: Dict[str, Tuple[str, ...]]) -> List[Release]:
-    releases: List[Release] = []
-    for item in parse_feed(feed_xml):
-        release = extract_release(item, series_matchers)
-        if release:
-            releases.append(release)
-    releases.sort(key=lambda rel: rel.published or datetime.min, reverse=True)
-    return releases
-
-
-def format_releases_text(releases: Sequence[Release]) -> str:
-    lines = []
-    for release in releases:
-        date_part = release.published.strftime("%Y/%m/%d") if release.published else "Unknown date"
-        lines.append(f"{date_part} | {release.series} | {release.title} | {release.link}")
-    return "\n".join(lines)
-
-
-def releases_to_json(releases: Sequence[Release]) -> str:
-    payload = [
-        {
-            "series": release.series,
-            "title": release.title,
-            "link": release.link,
-            "published": release.published.isoformat() if release.published else None,
-        }
-        for release in releases
-    ]
-    return json.dumps(payload, indent=2, ensure_ascii=False)
-
-
-def write_releases_csv(path: str, releases: Sequence[Release]) -> None:
-    """Append releases to CSV with a fetched timestamp, skipping duplicates."""
-    dir_name = os.path.dirname(os.path.abspath(path))
-    if dir_name and not os.path.exists(dir_name):
-        os.makedirs(dir_name, exist_ok=True)
-
-    existing_keys = set()
-    if os.path.exists(path) and os.path.getsize(path) > 0:
-        with open(path, "r", encoding="utf-8", newline="") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                existing_keys.add(
-                    (
-                        row.get("series", ""),
-                        row.get("title", ""),
-                        row.get("link", ""),
-                    )
-                )
-
-    # Prepare unique entries for this run
-    run_timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
-    fieldnames = ("fetched_at", "series", "title", "link", "published")
-    new_rows = []
-    for release in releases:
-        key = (release.series, release.title, release.link)
-        if key in existing_keys:
-            continue
-        existing_keys.add(key)
-        new_rows.append(
-            {
-                "fetched_at": run_timestamp,
-                "series": release.series,
-                "title": release.title,
-                "link": release.link,
-                "published": release.published.isoformat() if release.published else "",
-            }
-        )
-
-    if not new_rows:
-        return
-
-    file_exists = os.path.exists(path)
-    with open(path, "a", encoding="utf-8", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists or os.path.getsize(path) == 0:
-            writer.writeheader()
-        writer.writerows(new_rows)
-
-
-def build_series_matchers(series_overrides: Optional[Sequence[str]]) -> Dict[str, Tuple[str, ...]]:
-    if not series_overrides:
-        return DEFAULT_SERIES
-    matchers: Dict[str, Tuple[str, ...]] = {}
-    for series in series_overrides:
-        normalized = _normalize(series)
-        matchers[series] = (normalized,)
-    return matchers
-
-
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Fetch and filter Sergio Bonelli 'New Releases' feed.",
@@ -215,6 +79,10 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         nargs="+",
         help="Override series names to match (default: Dylan Dog, Martin Mystere, Zagor).",
     )
+    parser.add_argument(
+        "--series-file",
+        help="Watch list file, one 'Series Name: alias, alias' per line (combined with --series).",
+    )
     parser.add_argument(
         "--json",
         action="store_true",
@@ -225,37 +93,150 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         type=int,
         help="Limit the number of releases shown.",
     )
+    parser.add_argument(
+        "--since",
+        type=parse_cutoff,
+        help="Only releases published at or after this ISO date/datetime (naive means UTC).",
+    )
+    parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="Parse the whole feed even if it is ordered newest-first (disables early stop).",
+    )
+    parser.add_argument(
+        "--hedge-delay",
+        type=float,
+        default=DEFAULT_HEDGE_DELAY,
+        help="Seconds before the next mirror is tried in parallel (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--only-new",
+        action="store_true",
+        help=(
+            "Only report releases not seen by the previous --only-new run; uses conditional "
+            "requests (ETag/Last-Modified) and exits early on 304."
+        ),
+    )
     parser.add_argument(
         "--csv",
         help="Append results to the given CSV file for historical tracking.",
     )
+    parser.add_argument(
+        "--history-db",
+        help="Also record results in this SQLite history (query it with the 'history' subcommand).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and poll the feed(s), printing only newly seen releases as NDJSON.",
+    )
+    parser.add_argument(
+        "--watch-feed",
+        action="append",
+        default=[],
+        metavar="URL",
+        help="Additional feed URL to poll in --watch mode (repeatable).",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="Initial --watch poll interval in seconds; adapts per feed (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL,
+        help="Shortest --watch poll interval in seconds (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL,
+        help="Longest --watch poll interval in seconds (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--webhook",
+        metavar="URL",
+        help="In --watch mode POST new releases as NDJSON to this URL instead of stdout.",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["history"]:
+        return history_main(os.path.basename(sys.argv[0]) or "releases", argv[1:])
     args = parse_args(argv)
-    series_matchers = build_series_matchers(args.series)
+    series_matchers = build_series_matchers(DEFAULT_SERIES, args.series, args.series_file)
+    if args.watch:
+        return run_watch(args, series_matchers, FEED_CLIENT, DEFAULT_FEED_CANDIDATES)
 
+    fallbacks: Sequence[str] = (
+        DEFAULT_FEED_CANDIDATES[1:] if args.feed_url == DEFAULT_FEED_URL else ()
+    )
+    states: Optional[Dict[str, FeedState]] = None
+    previous_validators: Tuple[Optional[str], Optional[str]] = (None, None)
+    if args.only_new:
+        states = {url: load_feed_state(url) for url in (args.feed_url, *fallbacks)}
+        previous_validators = (states[args.feed_url].etag, states[args.feed_url].last_modified)
     try:
-        fallbacks: Sequence[str] = (
-            DEFAULT_FEED_CANDIDATES[1:] if args.feed_url == DEFAULT_FEED_URL else ()
+        feed_xml = fetch_feed(
+            FEED_CLIENT,
+            args.feed_url,
+            fallbacks=fallbacks,
+            hedge_delay=args.hedge_delay,
+            remember=bool(fallbacks),
+            states=states,
         )
-        feed_xml = fetch_feed(args.feed_url, fallbacks=fallbacks)
     except Exception as exc:  # pragma: no cover - network failures aren't predictable
         print(f"Failed to download feed: {exc}", file=sys.stderr)
         return 1
 
-    releases = load_releases(feed_xml, series_matchers)
-    if args.limit is not None:
-        releases = releases[: max(args.limit, 0)]
-
-    if args.csv:
-        write_releases_csv(args.csv, releases)
+    if feed_xml is None:
+        print("[]" if args.json else "No new releases.")
+        return 0
+
+    key_state = states[args.feed_url] if states else None
+    limit = None if args.limit is None else max(args.limit, 0)
+    releases = load_releases(
+        feed_xml,
+        series_matchers,
+        since=latest_cutoff(args.since, key_state.newest if key_state else None),
+        limit=None if key_state else limit,  # --only-new: limit only what is still unreported
+        early_stop=not args.full_scan,
+    )
+    truncated = False
+    if key_state:
+        releases, truncated = unreported_releases(releases, key_state, limit)
+        if not releases and not args.json:
+            for state in states.values():
+                save_feed_state(state)
+            print("No new releases.")
+            return 0
+    elif limit is not None:
+        releases = releases[:limit]
 
     if args.json:
         print(releases_to_json(releases))
     else:
         print(format_releases_text(releases))
+    if args.csv:
+        write_releases_csv(args.csv, releases)
+    if args.history_db:
+        record_history(args.history_db, releases)
+
+    if states:
+        # the cutoff only moves once the releases have been written out
+        for release in releases:
+            key_state.observe(release.published, (release.series, release.title, release.link))
+        if truncated:
+            # releases left out by --limit must not turn into a 304 next run
+            key_state.etag, key_state.last_modified = previous_validators
+            save_feed_state(key_state)
+        else:
+            for state in states.values():
+                save_feed_state(state)
     return 0
 
 
@@ -1,13 +1,23 @@
-import time
+import argparse
+import os
 import csv
+import json
 import re
+import sqlite3
 import sys
-import unicodedata
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from urllib.parse import urlencode, urlparse, parse_qs, urlunparse
 
 import requests
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from http_client import HttpClient  # noqa: E402
+from text_normalize import normalize_space, normalize_tag_label  # noqa: E402
+
 SERIES_SOURCES = [
     {"name": "Dylan Dog - Redovna serija", "url": "https://www.sergiobonelli.it/sezioni/43/fumetti?tag_0=1&noinit=true&sortDefault=false&sortElement=tag_2,true&exact_match.tag_64=Dylan%20Dog&exact_match.tag_92=Dylan%20Dog"},
     {"name": "Dylan Dog - Super Book", "url": "https://www.sergiobonelli.it/sezioni/43/fumetti?tag_0=1&noinit=true&sortDefault=false&sortElement=tag_2,true&exact_match.tag_64=Dylan%20Dog&exact_match.tag_92=Serie%20Super%20Book"},
@@ -33,10 +43,16 @@ HEADERS = {
 REQUEST_TIMEOUT = 25
 REQUEST_DELAY = 0.6
 MAX_EMPTY_PAGES = 2
+PREFETCH_PAGES = 2
 FETCH_DETAIL = False
+DETAIL_WORKERS = 4
+DETAIL_CACHE_PATH = "bonelli_detail_cache.db"
+CHECKPOINT_PATH = "bonelli_crawl_state.db"
+BASE_COLUMNS = ("series", "title", "url")
+DEFAULT_OUTPUT = "bonelli_dylan_dog_all.csv"
 
-session = requests.Session()
-session.headers.update(HEADERS)
+# REQUEST_DELAY je budzet po hostu, zajednicki za sve niti (--workers)
+session = HttpClient(headers=HEADERS, timeout=REQUEST_TIMEOUT, min_interval=REQUEST_DELAY)
 
 def build_series_url(base_url: str, page: int) -> str:
     parsed = urlparse(base_url)
@@ -45,20 +61,13 @@ def build_series_url(base_url: str, page: int) -> str:
     new_query = urlencode(query, doseq=True)
     return urlunparse(parsed._replace(query=new_query))
 
+def fetch_html(url: str) -> str:
+    response = session.get(url)
+    response.raise_for_status()
+    return response.text
+
 def get_soup(url: str) -> BeautifulSoup:
-    for attempt in range(3):
-        try:
-            response = session.get(url, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, "html.parser")
-        except Exception:
-            if attempt == 2:
-                raise
-            time.sleep(1.5 + attempt)
-    return BeautifulSoup("", "html.parser")
-
-def normalize_space(text: str) -> str:
-    return re.sub(r"\s+", " ", text or "").strip()
+    return BeautifulSoup(fetch_html(url), "html.parser")
 
 def extract_issue_number(text: str):
     text = text or ""
@@ -70,7 +79,7 @@ def extract_issue_number(text: str):
         return numbers[-1]
     return None
 
-def extract_cards_from_list(soup: BeautifulSoup):
+def _cards_from_archive_grid(soup: BeautifulSoup):
     cards = []
     for container in soup.select("div.cont_anteprima_ricerca_archivio div.anteprima_ricerca_archivio"):
         link = container.find("a", href=True)
@@ -102,35 +111,102 @@ def extract_cards_from_list(soup: BeautifulSoup):
             data_value = value_node.get("data-tag_value", valore) if value_node else valore
             tags[tag_cls] = {"nome": nome, "valore": valore, "data": data_value}
         cards.append({"url": href, "title_guess": title, "tags": tags})
-    if not cards:
-        for container in soup.select("div.article_cont"):
-            article = container.find("article")
-            if not article:
-                continue
-            link = article.find("a", href=True)
-            if not link:
-                continue
-            href = link.get("href", "").strip()
-            if not href:
-                continue
-            if not href.startswith("http"):
-                href = requests.compat.urljoin("https://www.sergiobonelli.it/", href)
-            title_node = article.find(["h2", "h3"])
-            title = normalize_space(title_node.get_text(" ", strip=True) if title_node else link.get_text(" ", strip=True))
-            if len(title) < 3:
-                continue
-            cards.append({"url": href, "title_guess": title, "tags": {}})
-    if not cards:
-        for link in soup.select("a[href*='/scheda/']"):
-            href = link.get("href", "")
-            if not href:
-                continue
-            if not href.startswith("http"):
-                href = requests.compat.urljoin("https://www.sergiobonelli.it/", href)
-            title = normalize_space(link.get_text(" ", strip=True))
-            if len(title) < 3:
-                continue
-            cards.append({"url": href, "title_guess": title, "tags": {}})
+    return cards
+
+def _cards_from_article_cont(soup: BeautifulSoup):
+    cards = []
+    for container in soup.select("div.article_cont"):
+        article = container.find("article")
+        if not article:
+            continue
+        link = article.find("a", href=True)
+        if not link:
+            continue
+        href = link.get("href", "").strip()
+        if not href:
+            continue
+        if not href.startswith("http"):
+            href = requests.compat.urljoin("https://www.sergiobonelli.it/", href)
+        title_node = article.find(["h2", "h3"])
+        title = normalize_space(title_node.get_text(" ", strip=True) if title_node else link.get_text(" ", strip=True))
+        if len(title) < 3:
+            continue
+        cards.append({"url": href, "title_guess": title, "tags": {}})
+    return cards
+
+def _cards_from_scheda_links(soup: BeautifulSoup):
+    cards = []
+    for link in soup.select("a[href*='/scheda/']"):
+        href = link.get("href", "")
+        if not href:
+            continue
+        if not href.startswith("http"):
+            href = requests.compat.urljoin("https://www.sergiobonelli.it/", href)
+        title = normalize_space(link.get_text(" ", strip=True))
+        if len(title) < 3:
+            continue
+        cards.append({"url": href, "title_guess": title, "tags": {}})
+    return cards
+
+# redosled je podrazumevani prioritet; SelectorStrategies pamti pobednika po izvoru
+CARD_STRATEGIES = (
+    ("anteprima_ricerca_archivio", _cards_from_archive_grid),
+    ("article_cont", _cards_from_article_cont),
+    ("scheda_links", _cards_from_scheda_links),
+)
+
+class SelectorStrategies:
+    """
+    Pamti koja strategija selektora je uspela za svaki izvor (seriju) i nju
+    prvu pokusava; ostale se probaju samo kad omiljena ne vrati nista.
+    Broji pogotke/promasaje i vreme parsiranja po strategiji.
+    """
+
+    def __init__(self, strategies=CARD_STRATEGIES):
+        self.strategies = tuple(strategies)
+        self._preferred = {}
+        self._lock = threading.Lock()
+        self.hits = {name: 0 for name, _ in self.strategies}
+        self.misses = {name: 0 for name, _ in self.strategies}
+        self.seconds = {name: 0.0 for name, _ in self.strategies}
+
+    def _ordered(self, source):
+        with self._lock:
+            preferred = self._preferred.get(source)
+        if preferred is None:
+            return self.strategies
+        return tuple(sorted(self.strategies, key=lambda item: item[0] != preferred))
+
+    def extract(self, soup: BeautifulSoup, source=None):
+        for name, strategy in self._ordered(source):
+            started = time.perf_counter()
+            cards = strategy(soup)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.seconds[name] += elapsed
+                if not cards:
+                    self.misses[name] += 1
+                    continue
+                self.hits[name] += 1
+                previous = self._preferred.get(source)
+                self._preferred[source] = name
+            if previous and previous != name:
+                print(f"  [WARN] [{source}] selektor '{previous}' nije nasao kartice, sada '{name}' (promenjen HTML?)", file=sys.stderr)
+            return cards
+        return []
+
+    def report(self):
+        lines = ["Strategije selektora (pogodaka / promasaja / prosek ms):"]
+        for name, _ in self.strategies:
+            calls = self.hits[name] + self.misses[name]
+            avg_ms = (self.seconds[name] / calls * 1000) if calls else 0.0
+            lines.append(f"  {name}: {self.hits[name]} / {self.misses[name]} / {avg_ms:.1f}")
+        return "\n".join(lines)
+
+selector_strategies = SelectorStrategies()
+
+def extract_cards_from_list(soup: BeautifulSoup, source=None):
+    cards = selector_strategies.extract(soup, source)
     unique = {}
     for card in cards:
         unique[card["url"]] = card
@@ -179,40 +255,158 @@ def extract_from_detail(url: str):
     release = extract_release_date(soup)
     return series, issue_no, page_title, release
 
-def normalize_tag_label(raw_label: str):
-    label = normalize_space(raw_label).strip(" :")
-    if not label:
-        return None
-    label = label.replace("°", "").replace("º", "")
-    label = "".join(ch for ch in unicodedata.normalize("NFKD", label) if not unicodedata.combining(ch))
-    label = normalize_space(label)
-    lower = label.lower()
-    if lower in {"n", "no", "numero", "num"}:
-        return "Broj"
-    if lower == "uscita":
-        return "Uscita"
-    if lower == "periodicita":
-        return "Periodicita"
-    if lower == "prezzo":
-        return "Prezzo"
-    return label
-
-def process_card(series_name: str, card: dict):
+class DetailEnricher:
+    """
+    Konkurentno dopunjavanje kartica podacima sa detalj strane.
+    (series, issue_no, title, release) se trajno kesira po URL-u kartice,
+    pa se skidaju samo kartice koje nikad ranije nisu vidjene.
+    """
+
+    def __init__(self, cache_path: str = DETAIL_CACHE_PATH, workers: int = DETAIL_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=max(workers, 1))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS detail ("
+            "url TEXT PRIMARY KEY, series TEXT, issue_no TEXT, title TEXT, release TEXT, fetched_at TEXT)"
+        )
+        self._conn.commit()
+
+    def close(self):
+        self.pool.shutdown()
+        with self._lock:
+            self._conn.close()
+
+    def _cached(self, urls):
+        found = {}
+        with self._lock:
+            for url in urls:
+                row = self._conn.execute(
+                    "SELECT series, issue_no, title, release FROM detail WHERE url = ?", (url,)
+                ).fetchone()
+                if row:
+                    found[url] = row
+        return found
+
+    def _store(self, fetched):
+        stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO detail (url, series, issue_no, title, release, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(url, *detail, stamp) for url, detail in fetched.items()],
+            )
+            self._conn.commit()
+
+    def enrich(self, cards):
+        """Vraca {url: (series, issue_no, title, release)} za kartice sa strane."""
+        urls = [card["url"] for card in cards]
+        details = self._cached(urls)
+        futures = {url: self.pool.submit(extract_from_detail, url) for url in urls if url not in details}
+        fetched = {}
+        for url, future in futures.items():
+            try:
+                fetched[url] = future.result()
+            except Exception as exc:
+                print(f"  [WARN] Problem sa detaljem: {url} -> {exc}", file=sys.stderr)
+        if fetched:
+            self._store(fetched)
+        details.update(fetched)
+        return details
+
+class CrawlCheckpoint:
+    """
+    Stanje crawl-a posle svake strane: sledeca strana i broj praznih strana po
+    seriji, plus svi do sada prikupljeni redovi i tag labele. Redovi se ovde
+    prelivaju na disk umesto da se drze u memoriji; CSV se na kraju sklapa
+    jednim prolazom kroz `iter_rows`.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if not resume:
+            self._conn.executescript(
+                "DROP TABLE IF EXISTS series_state; DROP TABLE IF EXISTS rows; DROP TABLE IF EXISTS tags;"
+            )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS series_state (
+                series TEXT PRIMARY KEY, next_page INTEGER NOT NULL,
+                empty_pages INTEGER NOT NULL, done INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS rows (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, series TEXT NOT NULL,
+                url TEXT NOT NULL, data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_rows_series ON rows (series, id);
+            CREATE TABLE IF NOT EXISTS tags (
+                series TEXT NOT NULL, label TEXT NOT NULL, PRIMARY KEY (series, label)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def load(self, series_name: str):
+        """Vraca (next_page, empty_pages, done, seen_urls, broj_redova) za seriju."""
+        with self._lock:
+            state = self._conn.execute(
+                "SELECT next_page, empty_pages, done FROM series_state WHERE series = ?", (series_name,)
+            ).fetchone()
+            seen_urls = {url for (url,) in self._conn.execute("SELECT url FROM rows WHERE series = ?", (series_name,))}
+        next_page, empty_pages, done = state or (1, 0, 0)
+        return next_page, empty_pages, bool(done), seen_urls, len(seen_urls)
+
+    def save_page(self, series_name: str, page_rows, page_tags, next_page: int, empty_pages: int, done: bool = False):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO rows (series, url, data) VALUES (?, ?, ?)",
+                [(series_name, row["url"], json.dumps(row, ensure_ascii=False)) for row in page_rows],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tags (series, label) VALUES (?, ?)",
+                [(series_name, label) for label in page_tags],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO series_state (series, next_page, empty_pages, done) VALUES (?, ?, ?, ?)",
+                (series_name, next_page, empty_pages, int(done)),
+            )
+
+    def tag_labels(self, series_name=None):
+        with self._lock:
+            if series_name is None:
+                cursor = self._conn.execute("SELECT DISTINCT label FROM tags")
+            else:
+                cursor = self._conn.execute("SELECT label FROM tags WHERE series = ?", (series_name,))
+            return {label for (label,) in cursor}
+
+    def iter_rows(self, series_names):
+        """Redovi serija redom kojim su prikupljeni, bez ucitavanja svih u memoriju."""
+        # posebna konekcija da citanje ne drzi lock dok CSV pise
+        reader = sqlite3.connect(self.path)
+        try:
+            for series_name in series_names:
+                for (data,) in reader.execute("SELECT data FROM rows WHERE series = ? ORDER BY id", (series_name,)):
+                    yield json.loads(data)
+        finally:
+            reader.close()
+
+def process_card(series_name: str, card: dict, detail=None):
     issue_no = extract_issue_number(card.get("title_guess", ""))
     page_title = card.get("title_guess", "")
     release = ""
-    if FETCH_DETAIL:
-        try:
-            detail_series, detail_issue, detail_title, detail_release = extract_from_detail(card["url"])
-            if detail_title:
-                page_title = detail_title
-            if detail_issue:
-                issue_no = detail_issue
-            if detail_release:
-                release = detail_release
-            time.sleep(REQUEST_DELAY)
-        except Exception as exc:
-            print(f"  [WARN] Problem sa detaljem: {card['url']} -> {exc}", file=sys.stderr)
+    if detail:
+        detail_series, detail_issue, detail_title, detail_release = detail
+        if detail_title:
+            page_title = detail_title
+        if detail_issue:
+            issue_no = detail_issue
+        if detail_release:
+            release = detail_release
     tag_values = {}
     for info in card.get("tags", {}).values():
         label = normalize_tag_label(info.get("nome", ""))
@@ -235,39 +429,86 @@ def process_card(series_name: str, card: dict):
     row.update(tag_values)
     return row, set(tag_values.keys())
 
-def collect_series(series_name: str, base_url: str):
-    rows = []
-    tag_labels = set()
-    seen_urls = set()
-    page = 1
-    empty_pages = 0
-    while True:
-        page_url = build_series_url(base_url, page)
-        print(f"[{series_name}] [PAGE {page}] {page_url}")
-        soup = get_soup(page_url)
-        cards = extract_cards_from_list(soup)
-        cards = [card for card in cards if card["url"] not in seen_urls]
-        for card in cards:
-            seen_urls.add(card["url"])
-        if not cards:
-            empty_pages += 1
-            if empty_pages >= MAX_EMPTY_PAGES:
+def collect_series(series_name: str, base_url: str, checkpoint, prefetch: int = PREFETCH_PAGES, enricher=None, known_urls=None, stop=None):
+    """
+    Prikuplja seriju u `checkpoint` strana po strana; vraca (broj_stavki, tag_labele).
+    Sa `known_urls` (inkrementalni rad) serija staje na prvoj strani koja je cela poznata.
+    Kad se postavi `stop` (threading.Event), serija staje posle tekuce strane.
+    """
+    page, empty_pages, done, seen_urls, total = checkpoint.load(series_name)
+    if done:
+        print(f"[{series_name}] vec zavrseno u checkpoint-u ({total} stavki).")
+        return total, checkpoint.tag_labels(series_name)
+    if total or page > 1:
+        print(f"[{series_name}] nastavljam od strane {page} ({total} stavki iz checkpoint-a)")
+    tag_labels = checkpoint.tag_labels(series_name)
+    # strane N+1..N+prefetch se skidaju dok se strana N parsira; session drzi budzet po hostu
+    prefetch = max(prefetch, 0)
+    pool = ThreadPoolExecutor(max_workers=prefetch + 1)
+    pending = {}
+    next_page = page
+    try:
+        while True:
+            if stop is not None and stop.is_set():
+                print(f"[{series_name}] prekinuto - nastavak od strane {page} sa --resume.")
+                break
+            while next_page <= page + prefetch:
+                pending[next_page] = pool.submit(fetch_html, build_series_url(base_url, next_page))
+                next_page += 1
+            page_url = build_series_url(base_url, page)
+            print(f"[{series_name}] [PAGE {page}] {page_url}")
+            soup = BeautifulSoup(pending.pop(page).result(), "html.parser")
+            page_rows = []
+            page_tags = set()
+            done = False
+            collected = _collect_page(series_name, soup, page, seen_urls, page_rows, page_tags, enricher, known_urls)
+            if collected is None:
+                done = True
+            elif not collected:
+                empty_pages += 1
+                done = empty_pages >= MAX_EMPTY_PAGES
+            else:
+                empty_pages = 0
+            checkpoint.save_page(series_name, page_rows, page_tags, page + 1, empty_pages, done)
+            total += len(page_rows)
+            tag_labels.update(page_tags)
+            if collected is None:
+                print(f"[{series_name}] strana {page} je vec poznata - nema novih izdanja dalje.")
+                break
+            if done:
                 print(f"[{series_name}] nema vise rezultata. Prelazim dalje.")
                 break
             page += 1
-            time.sleep(REQUEST_DELAY)
-            continue
-        empty_pages = 0
-        for idx, card in enumerate(cards, 1):
-            row, used_tags = process_card(series_name, card)
-            rows.append(row)
-            tag_labels.update(used_tags)
-            if idx % 10 == 0:
-                print(f"  ... obrada {idx}/{len(cards)} na strani {page}")
-        page += 1
-        time.sleep(REQUEST_DELAY)
-    print(f"[{series_name}] ukupno {len(rows)} stavki")
-    return rows, tag_labels
+    finally:
+        for future in pending.values():
+            future.cancel()
+        pool.shutdown(wait=False)
+    print(f"[{series_name}] ukupno {total} stavki")
+    return total, tag_labels
+
+def _collect_page(series_name: str, soup: BeautifulSoup, page: int, seen_urls: set, rows: list, tag_labels: set, enricher=None, known_urls=None):
+    """
+    Dodaje nove kartice sa strane u rows i vraca njihov broj (0 = prazna strana).
+    Vraca None ako su sve kartice na strani vec poznate iz prethodnog pokretanja.
+    """
+    cards = extract_cards_from_list(soup, source=series_name)
+    cards = [card for card in cards if card["url"] not in seen_urls]
+    if known_urls is not None and cards:
+        if all(card["url"] in known_urls for card in cards):
+            return None
+        cards = [card for card in cards if card["url"] not in known_urls]
+    for card in cards:
+        seen_urls.add(card["url"])
+    if not cards:
+        return 0
+    details = enricher.enrich(cards) if enricher else {}
+    for idx, card in enumerate(cards, 1):
+        row, used_tags = process_card(series_name, card, details.get(card["url"]))
+        rows.append(row)
+        tag_labels.update(used_tags)
+        if idx % 10 == 0:
+            print(f"  ... obrada {idx}/{len(cards)} na strani {page}")
+    return len(cards)
 
 def build_tag_columns(all_tags):
     preferred = ["Broj", "Uscita", "Periodicita", "Prezzo"]
@@ -276,26 +517,157 @@ def build_tag_columns(all_tags):
     ordered.extend(remaining)
     return ordered
 
-def main():
-    out_csv = "bonelli_dylan_dog_all.csv"
-    all_rows = []
-    all_tags = set()
-    total = 0
-    for entry in SERIES_SOURCES:
-        series_rows, series_tags = collect_series(entry["name"], entry["url"])
-        all_rows.extend(series_rows)
-        all_tags.update(series_tags)
-        total += len(series_rows)
-    if not all_rows:
-        print("Nisam pronasao stavke - proveri filtere/URL/selektore.")
-        return
-    fieldnames = ["series", "title", "url"] + build_tag_columns(all_tags)
-    with open(out_csv, "w", newline="", encoding="utf-8") as handle:
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Preuzima Bonelli katalog po serijama u jedan CSV.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Izlazni CSV (default: %(default)s).")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Broj serija koje se obradjuju istovremeno; REQUEST_DELAY po hostu vazi za sve zajedno (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=PREFETCH_PAGES,
+        help="Koliko strana unapred se skida dok se tekuca parsira (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--detail",
+        action="store_true",
+        default=FETCH_DETAIL,
+        help="Dopuni kartice podacima sa detalj strane (kesirano u --detail-cache).",
+    )
+    parser.add_argument(
+        "--detail-workers",
+        type=int,
+        default=DETAIL_WORKERS,
+        help="Broj istovremenih zahteva za detalj strane (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--detail-cache",
+        default=DETAIL_CACHE_PATH,
+        help="SQLite kes vec obradjenih detalj strana (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=CHECKPOINT_PATH,
+        help="SQLite fajl sa stanjem crawl-a, azurira se posle svake strane (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Samo nova izdanja: serija staje na prvoj vec poznatoj strani, novi redovi se dodaju u --output.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Nastavi od poslednjeg checkpoint-a umesto od pocetka.",
+    )
+    return parser.parse_args(argv)
+
+def load_known_urls(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", newline="", encoding="utf-8") as handle:
+        return {row["url"] for row in csv.DictReader(handle) if row.get("url")}
+
+def write_csv(out_csv: str, checkpoint, merge: bool = False, dest=None) -> int:
+    """
+    Sklapa CSV iz checkpoint-a u jednom prolazu; zaglavlje je unija svih tag labela.
+    Sa `merge` postojeci CSV se prepisuje redom, a novi redovi (po URL-u) dodaju na kraj.
+    Rezultat ide u `dest` (podrazumevano `out_csv`). Vraca broj upisanih novih redova.
+    """
+    dest = dest or out_csv
+    existing_tags = set()
+    merging = merge and os.path.exists(out_csv)
+    if merging:
+        with open(out_csv, "r", newline="", encoding="utf-8") as handle:
+            existing_tags = set(csv.DictReader(handle).fieldnames or []) - set(BASE_COLUMNS)
+    fieldnames = list(BASE_COLUMNS) + build_tag_columns(existing_tags | checkpoint.tag_labels())
+    tmp_csv = dest + ".tmp"
+    written = 0
+    existing_urls = set()
+    with open(tmp_csv, "w", newline="", encoding="utf-8") as handle:
         writer = csv.DictWriter(handle, fieldnames=fieldnames)
         writer.writeheader()
-        for row in all_rows:
+        if merging:
+            with open(out_csv, "r", newline="", encoding="utf-8") as previous:
+                for row in csv.DictReader(previous):
+                    existing_urls.add(row.get("url"))
+                    writer.writerow(row)
+        for row in checkpoint.iter_rows(entry["name"] for entry in SERIES_SOURCES):
+            if row["url"] in existing_urls:
+                continue
             writer.writerow(row)
-    print(f"\nSacuvan CSV: {out_csv} (ukupno {total} stavki)")
+            written += 1
+    os.replace(tmp_csv, dest)
+    return written
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_csv = args.output
+    total = 0
+    completed = False
+    workers = max(1, min(args.workers, len(SERIES_SOURCES)))
+    enricher = DetailEnricher(args.detail_cache, args.detail_workers) if args.detail else None
+    checkpoint = CrawlCheckpoint(args.checkpoint, resume=args.resume)
+    # liste su sortirane po izlasku (sortElement=tag_2), pa su nova izdanja na prvim stranama
+    known_urls = load_known_urls(out_csv) if args.incremental else None
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = []
+    try:
+        # rezultati idu redom SERIES_SOURCES, a svaka serija ide strana po strana
+        futures = [
+            pool.submit(
+                collect_series,
+                entry["name"],
+                entry["url"],
+                checkpoint,
+                prefetch=args.prefetch,
+                enricher=enricher,
+                known_urls=known_urls,
+                stop=stop,
+            )
+            for entry in SERIES_SOURCES
+        ]
+        for future in futures:
+            series_total, _ = future.result()
+            total += series_total
+        completed = True
+    finally:
+        # Ctrl-C/greska: serije u toku staju posle tekuce strane, ostale se ne pokrecu
+        stop.set()
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=True)
+        if enricher:
+            enricher.close()
+        print(selector_strategies.report())
+        if not completed:
+            # prekid: redovi do poslednje zavrsene strane su vec na disku;
+            # --output ostaje netaknut (prethodni kompletan katalog), delimican ide pored njega
+            partial_csv = out_csv + ".partial"
+            partial = write_csv(out_csv, checkpoint, merge=args.incremental, dest=partial_csv)
+            if partial:
+                print(f"\nPrekinuto - delimican CSV: {partial_csv} ({partial} stavki); nastavi sa --resume", file=sys.stderr)
+            checkpoint.close()
+    if not total:
+        checkpoint.close()
+        if args.incremental:
+            print("Nema novih izdanja od poslednjeg pokretanja.")
+        else:
+            print("Nisam pronasao stavke - proveri filtere/URL/selektore.")
+        return
+    written = write_csv(out_csv, checkpoint, merge=args.incremental)
+    checkpoint.close()
+    if os.path.exists(out_csv + ".partial"):
+        os.remove(out_csv + ".partial")
+    if args.incremental:
+        print(f"\nDodato {written} novih stavki u CSV: {out_csv}")
+    else:
+        print(f"\nSacuvan CSV: {out_csv} (ukupno {written} stavki)")
 
 if __name__ == "__main__":
     main()
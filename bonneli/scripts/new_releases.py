@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""One CLI for new releases from every feed source (Bonelli and Veseli Cetvrtak)."""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+import bonelli_new_releases as bonelli  # noqa: E402
+import veseli_cetvrtak as vc  # noqa: E402
+from release_feeds import (  # noqa: E402
+    DEFAULT_HEDGE_DELAY,
+    Release,
+    SeriesMatcher,
+    build_series_matchers,
+    fetch_paged,
+    format_releases_text,
+    parse_cutoff,
+    releases_to_json,
+    write_releases_csv,
+)
+from release_history import history_main, record_history  # noqa: E402
+from text_normalize import fold_text  # noqa: E402
+
+SOURCE_MODULES = {
+    "bonelli": bonelli,
+    "veseli-cetvrtak": vc,
+}
+DEFAULT_SOURCES: Tuple[str, ...] = tuple(SOURCE_MODULES)
+DEFAULT_WORKERS = 6
+
+
+@dataclass
+class FeedJob:
+    source: str
+    url: str
+    fallbacks: Sequence[str] = ()
+    pages: int = 1
+
+
+def parse_source(value: str) -> Tuple[str, Optional[str]]:
+    """``bonelli`` / ``veseli-cetvrtak``, optionally ``=URL`` for a custom feed."""
+    name, _, url = value.partition("=")
+    name = name.strip().lower()
+    if name not in SOURCE_MODULES:
+        raise argparse.ArgumentTypeError(f"unknown source {name!r} (choose from {', '.join(SOURCE_MODULES)})")
+    return name, url.strip() or None
+
+
+def build_jobs(sources: Sequence[Tuple[str, Optional[str]]], vc_pages: int) -> List[FeedJob]:
+    jobs: List[FeedJob] = []
+    for name, url in sources:
+        module = SOURCE_MODULES[name]
+        feed_url = url or module.DEFAULT_FEED_URL
+        fallbacks = module.DEFAULT_FEED_CANDIDATES[1:] if feed_url == module.DEFAULT_FEED_URL else ()
+        jobs.append(FeedJob(name, feed_url, fallbacks, pages=vc_pages if module is vc else 1))
+    return jobs
+
+
+def fetch_job(
+    job: FeedJob,
+    matchers: SeriesMatcher,
+    since: Optional[datetime],
+    hedge_delay: float,
+    early_stop: bool,
+) -> Tuple[List[Release], List[str]]:
+    """One source: its feed, or its ``?paged=N`` pages until the feed is exhausted."""
+    module = SOURCE_MODULES[job.source]
+    releases, errors = fetch_paged(
+        module.FEED_CLIENT,
+        job.url,
+        job.pages,
+        matchers,
+        fallbacks=job.fallbacks,
+        since=since,
+        early_stop=early_stop,
+        hedge_delay=hedge_delay,
+    )
+    return releases or [], errors
+
+
+def dedupe_key(release: Release) -> Tuple[str, str, str]:
+    """Same series, title and day: one release, whichever mirror or page carried it."""
+    day = release.published.date().isoformat() if release.published else ""
+    return release.series, " ".join(fold_text(release.title).split()), day
+
+
+def collect_releases(
+    jobs: Sequence[FeedJob],
+    matchers: Dict[str, SeriesMatcher],
+    since: Optional[datetime] = None,
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    workers: int = DEFAULT_WORKERS,
+    early_stop: bool = True,
+) -> Tuple[List[Release], List[str]]:
+    """Fetch every job concurrently and merge them into one de-duplicated stream.
+
+    Results are merged in job order, so on a duplicate the source listed
+    first wins. Returns ``(releases, errors)`` with the jobs that failed
+    outright; a later page that fails is only reported on stderr.
+    """
+    releases: List[Release] = []
+    errors: List[str] = []
+    seen = set()
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(jobs)), 1)) as pool:
+        futures = [
+            pool.submit(fetch_job, job, matchers[job.source], since, hedge_delay, early_stop) for job in jobs
+        ]
+        for job, future in zip(jobs, futures):
+            try:
+                job_releases, page_errors = future.result()
+            except Exception as exc:  # pragma: no cover - network failures aren't predictable
+                errors.append(f"{job.source} {job.url}: {exc}")
+                continue
+            for error in page_errors:
+                print(f"Failed to download feed {job.source} {job.url} {error}", file=sys.stderr)
+            for release in job_releases:
+                release.source = job.source
+                key = dedupe_key(release)
+                if key in seen:
+                    continue
+                seen.add(key)
+                releases.append(release)
+    releases.sort(key=lambda rel: rel.published or datetime.min, reverse=True)
+    return releases, errors
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Fetch all release feeds at once and list new releases by series.",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        type=parse_source,
+        metavar="NAME[=URL]",
+        help=(
+            "Feed source to include, repeatable: "
+            f"{', '.join(SOURCE_MODULES)}, optionally with a custom feed URL (default: all)."
+        ),
+    )
+    parser.add_argument(
+        "--vc-pages",
+        type=int,
+        default=1,
+        help="Most Veseli Cetvrtak feed pages to fetch; stops once the feed is exhausted (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Feeds fetched concurrently (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--series",
+        nargs="+",
+        help="Override series names to match (default: each source's own list).",
+    )
+    parser.add_argument(
+        "--series-file",
+        help="Watch list file, one 'Series Name: alias, alias' per line (combined with --series).",
+    )
+    parser.add_argument(
+        "--since",
+        type=parse_cutoff,
+        help="Only releases published at or after this ISO date/datetime (naive means UTC).",
+    )
+    parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="Parse whole feeds even if they are ordered newest-first (disables early stop).",
+    )
+    parser.add_argument(
+        "--hedge-delay",
+        type=float,
+        default=DEFAULT_HEDGE_DELAY,
+        help="Seconds before the next mirror is tried in parallel (default: %(default)s).",
+    )
+    parser.add_argument("--json", action="store_true", help="Output JSON instead of text.")
+    parser.add_argument("--limit", type=int, help="Limit number of releases returned.")
+    parser.add_argument("--csv", help="Append results to the given CSV file for historical tracking.")
+    parser.add_argument(
+        "--history-db",
+        help="Also record results in this SQLite history (query it with the 'history' subcommand).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["history"]:
+        return history_main(os.path.basename(sys.argv[0]) or "new_releases", argv[1:])
+    args = parse_args(argv)
+    sources = args.source or [(name, None) for name in DEFAULT_SOURCES]
+    matchers = {
+        name: build_series_matchers(module.DEFAULT_SERIES, args.series, args.series_file)
+        for name, module in SOURCE_MODULES.items()
+    }
+    jobs = build_jobs(sources, args.vc_pages)
+    releases, errors = collect_releases(
+        jobs,
+        matchers,
+        since=args.since,
+        hedge_delay=args.hedge_delay,
+        workers=args.workers,
+        early_stop=not args.full_scan,
+    )
+    for error in errors:
+        print(f"Failed to download feed {error}", file=sys.stderr)
+    if errors and len(errors) == len(jobs):
+        return 1
+
+    if args.limit is not None:
+        releases = releases[: max(args.limit, 0)]
+
+    if args.csv and releases:
+        write_releases_csv(args.csv, releases)
+    if args.history_db and releases:
+        record_history(args.history_db, releases)
+
+    if args.json:
+        print(releases_to_json(releases))
+    elif releases:
+        print(format_releases_text(releases))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
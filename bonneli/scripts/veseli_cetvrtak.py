@@ -4,20 +4,36 @@
 from __future__ import annotations
 
 import argparse
-import csv
-import json
 import os
 import sys
-import unicodedata
 import warnings
-import urllib.request
-import urllib.error
-from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
-import xml.etree.ElementTree as ET
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from email.utils import parsedate_to_datetime
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from feed_watch import (  # noqa: E402
+    DEFAULT_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    run_watch,
+)
+from http_client import HttpClient  # noqa: E402
+from release_history import history_main, record_history  # noqa: E402
+from release_feeds import (  # noqa: E402
+    DEFAULT_HEDGE_DELAY,
+    DEFAULT_PAGE_WORKERS,
+    FeedState,
+    build_series_matchers,
+    fetch_paged,
+    format_releases_text,
+    latest_cutoff,
+    load_feed_state,
+    parse_cutoff,
+    releases_to_json,
+    save_feed_state,
+    unreported_releases,
+    write_releases_csv,
+)
 
 warnings.filterwarnings(
     "ignore",
@@ -41,6 +57,12 @@ DEFAULT_FEED_CANDIDATES: Tuple[str, ...] = (
 DEFAULT_FEED_URL = DEFAULT_FEED_CANDIDATES[0]
 DEFAULT_TIMEOUT = 15
 
+FEED_CLIENT = HttpClient(
+    headers={"User-Agent": "veseli-cetvrtak-new-releases/1.0 (+https://github.com/)"},
+    timeout=DEFAULT_TIMEOUT,
+    retries=1,  # mirrors in DEFAULT_FEED_CANDIDATES are the real fallback
+)
+
 # Map display name -> tuple of match keywords (normalized to ASCII, lowercase)
 DEFAULT_SERIES: Dict[str, Tuple[str, ...]] = {
     "Dylan Dog": ("dylan dog", "dilan dog"),
@@ -49,178 +71,6 @@ DEFAULT_SERIES: Dict[str, Tuple[str, ...]] = {
 }
 
 
-@dataclass
-class Release:
-    series: str
-    title: str
-    link: str
-    published: Optional[datetime]
-
-
-def _normalize(text: str) -> str:
-    """Lowercase ASCII approximation for consistent string matching."""
-    normalized = unicodedata.normalize("NFKD", text)
-    return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
-
-
-def fetch_feed(
-    url: str,
-    timeout: int = DEFAULT_TIMEOUT,
-    fallbacks: Sequence[str] = (),
-) -> bytes:
-    errors: List[str] = []
-    for candidate in (url, *fallbacks):
-        request = urllib.request.Request(
-            candidate,
-            headers={
-                "User-Agent": "veseli-cetvrtak-new-releases/1.0 (+https://github.com/)",
-            },
-        )
-        try:
-            with urllib.request.urlopen(request, timeout=timeout) as response:
-                return response.read()
-        except urllib.error.HTTPError as err:
-            errors.append(
-                f"{candidate} -> HTTP {err.code} {err.reason or ''}".rstrip()
-            )
-        except Exception as exc:
-            errors.append(f"{candidate} -> {exc}")
-    raise RuntimeError("All feed URLs failed:\n" + "\n".join(errors))
-
-
-def parse_feed(feed_xml: bytes) -> Iterable[ET.Element]:
-    root = ET.fromstring(feed_xml)
-    channel = root.find("channel")
-    if channel is None:
-        return []
-    return channel.findall("item")
-
-
-def extract_release(
-    item: ET.Element,
-    series_matchers: Dict[str, Tuple[str, ...]],
-) -> Optional[Release]:
-    title_elem = item.findtext("title") or ""
-    link_elem = item.findtext("link") or ""
-    pub_date_raw = item.findtext("pubDate")
-    published = None
-    if pub_date_raw:
-        try:
-            published = parsedate_to_datetime(pub_date_raw)
-        except (TypeError, ValueError):
-            published = None
-
-    normalized_title = _normalize(title_elem)
-    for series_name, keywords in series_matchers.items():
-        if any(keyword in normalized_title for keyword in keywords):
-            return Release(
-                series=series_name,
-                title=title_elem.strip(),
-                link=link_elem.strip(),
-                published=published,
-            )
-    return None
-
-
-def load_releases(feed_xml: bytes, series_matchers: Dict[str, Tuple[str, ...]]) -> List[Release]:
-    releases: List[Release] = []
-    for item in parse_feed(feed_xml):
-        release = extract_release(item, series_matchers)
-        if release:
-            releases.append(release)
-    releases.sort(key=lambda rel: rel.published or datetime.min, reverse=True)
-    return releases
-
-
-def format_releases_text(releases: Sequence[Release]) -> str:
-    lines = []
-    for release in releases:
-        date_part = release.published.strftime("%Y/%m/%d") if release.published else "Unknown date"
-        lines.append(f"{date_part} | {release.series} | {release.title} | {release.link}")
-    return "\n".join(lines)
-
-
-def releases_to_json(releases: Sequence[Release]) -> str:
-    payload = [
-        {
-            "series": release.series,
-            "title": release.title,
-            "link": release.link,
-            "published": release.published.isoformat() if release.published else None,
-        }
-        for release in releases
-    ]
-    return json.dumps(payload, indent=2, ensure_ascii=False)
-
-
-def _with_paged(url: str, paged: int) -> str:
-    if paged <= 1:
-        return url
-    parsed = urlparse(url)
-    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
-    query["paged"] = str(paged)
-    new_query = urlencode(query, doseq=True)
-    return urlunparse(parsed._replace(query=new_query))
-
-
-def write_releases_csv(path: str, releases: Sequence[Release]) -> None:
-    """Append releases to CSV with a fetched timestamp, skipping duplicates."""
-    dir_name = os.path.dirname(os.path.abspath(path))
-    if dir_name and not os.path.exists(dir_name):
-        os.makedirs(dir_name, exist_ok=True)
-
-    existing_keys = set()
-    if os.path.exists(path) and os.path.getsize(path) > 0:
-        with open(path, "r", encoding="utf-8", newline="") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                existing_keys.add(
-                    (
-                        row.get("series", ""),
-                        row.get("title", ""),
-                        row.get("link", ""),
-                    )
-                )
-
-    run_timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
-    fieldnames = ("fetched_at", "series", "title", "link", "published")
-    new_rows = []
-    for release in releases:
-        key = (release.series, release.title, release.link)
-        if key in existing_keys:
-            continue
-        existing_keys.add(key)
-        new_rows.append(
-            {
-                "fetched_at": run_timestamp,
-                "series": release.series,
-                "title": release.title,
-                "link": release.link,
-                "published": release.published.isoformat() if release.published else "",
-            }
-        )
-
-    if not new_rows:
-        return
-
-    file_exists = os.path.exists(path)
-    with open(path, "a", encoding="utf-8", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not file_exists or os.path.getsize(path) == 0:
-            writer.writeheader()
-        writer.writerows(new_rows)
-
-
-def build_series_matchers(series_overrides: Optional[Sequence[str]]) -> Dict[str, Tuple[str, ...]]:
-    if not series_overrides:
-        return DEFAULT_SERIES
-    matchers: Dict[str, Tuple[str, ...]] = {}
-    for series in series_overrides:
-        normalized = _normalize(series)
-        matchers[series] = (normalized,)
-    return matchers
-
-
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Fetch and filter Veseli Cetvrtak product feed for new releases by series.",
@@ -235,6 +85,10 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         nargs="+",
         help="Override series names to match (default: Dylan Dog, Martin Mystere, Zagor).",
     )
+    parser.add_argument(
+        "--series-file",
+        help="Watch list file, one 'Series Name: alias, alias' per line (combined with --series).",
+    )
     parser.add_argument(
         "--json",
         action="store_true",
@@ -251,56 +105,161 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
         default=1,
         help="Number of feed pages to fetch starting from page 1 (default: %(default)s).",
     )
+    parser.add_argument(
+        "--page-workers",
+        type=int,
+        default=DEFAULT_PAGE_WORKERS,
+        help="Feed pages fetched concurrently with --paged (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--since",
+        type=parse_cutoff,
+        help="Only releases published at or after this ISO date/datetime (naive means UTC).",
+    )
+    parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="Parse the whole feed even if it is ordered newest-first (disables early stop).",
+    )
+    parser.add_argument(
+        "--hedge-delay",
+        type=float,
+        default=DEFAULT_HEDGE_DELAY,
+        help="Seconds before the next mirror is tried in parallel (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--only-new",
+        action="store_true",
+        help=(
+            "Only report releases not seen by the previous --only-new run; uses conditional "
+            "requests (ETag/Last-Modified) and exits early on 304."
+        ),
+    )
     parser.add_argument(
         "--csv",
         help="Append results to the given CSV file for historical tracking.",
     )
+    parser.add_argument(
+        "--history-db",
+        help="Also record results in this SQLite history (query it with the 'history' subcommand).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and poll the feed(s), printing only newly seen releases as NDJSON.",
+    )
+    parser.add_argument(
+        "--watch-feed",
+        action="append",
+        default=[],
+        metavar="URL",
+        help="Additional feed URL to poll in --watch mode (repeatable).",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="Initial --watch poll interval in seconds; adapts per feed (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL,
+        help="Shortest --watch poll interval in seconds (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL,
+        help="Longest --watch poll interval in seconds (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--webhook",
+        metavar="URL",
+        help="In --watch mode POST new releases as NDJSON to this URL instead of stdout.",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["history"]:
+        return history_main(os.path.basename(sys.argv[0]) or "releases", argv[1:])
     args = parse_args(argv)
-    series_matchers = build_series_matchers(args.series)
-    page_count = max(args.paged, 1)
-    all_releases: List[Release] = []
-    seen_keys = set()
-
-    for page in range(1, page_count + 1):
-        try:
-            fallbacks: Sequence[str] = ()
-            if args.feed_url == DEFAULT_FEED_URL:
-                fallbacks = tuple(_with_paged(url, page) for url in DEFAULT_FEED_CANDIDATES[1:])
-            feed_url = _with_paged(args.feed_url, page)
-            feed_xml = fetch_feed(feed_url, fallbacks=fallbacks)
-        except Exception as exc:  # pragma: no cover - network failures aren't predictable
-            print(f"Failed to download feed page {page}: {exc}", file=sys.stderr)
-            if page == 1:
-                return 1
-            continue
+    series_matchers = build_series_matchers(DEFAULT_SERIES, args.series, args.series_file)
+    if args.watch:
+        return run_watch(args, series_matchers, FEED_CLIENT, DEFAULT_FEED_CANDIDATES)
+    key_state = load_feed_state(args.feed_url) if args.only_new else None
+    previous_validators = (key_state.etag, key_state.last_modified) if key_state else (None, None)
+    since = latest_cutoff(args.since, key_state.newest if key_state else None)
+    limit = None if args.limit is None else max(args.limit, 0)
+    fetched_states: Dict[str, FeedState] = {}
+
+    def state_for(url: str) -> FeedState:
+        if url not in fetched_states:
+            fetched_states[url] = key_state if url == key_state.url else load_feed_state(url)
+        return fetched_states[url]
 
-        page_releases = load_releases(feed_xml, series_matchers)
-        for release in page_releases:
-            key = (release.series, release.title, release.link)
-            if key in seen_keys:
-                continue
-            seen_keys.add(key)
-            all_releases.append(release)
-
-    if not all_releases:
+    try:
+        all_releases, errors = fetch_paged(
+            FEED_CLIENT,
+            args.feed_url,
+            args.paged,
+            series_matchers,
+            fallbacks=DEFAULT_FEED_CANDIDATES[1:] if args.feed_url == DEFAULT_FEED_URL else (),
+            since=since,
+            limit=None if key_state else limit,  # --only-new: limit only what is still unreported
+            early_stop=not args.full_scan,
+            hedge_delay=args.hedge_delay,
+            workers=args.page_workers,
+            state_for=state_for if key_state else None,
+        )
+    except Exception as exc:  # pragma: no cover - network failures aren't predictable
+        print(f"Failed to download feed page 1: {exc}", file=sys.stderr)
+        return 1
+    for error in errors:
+        print(f"Failed to download feed {error}", file=sys.stderr)
+    if all_releases is None:
+        print("[]" if args.json else "No new releases.")
         return 0
 
     all_releases.sort(key=lambda rel: rel.published or datetime.min, reverse=True)
     releases = all_releases
-    if args.limit is not None:
-        releases = releases[: max(args.limit, 0)]
-
-    if args.csv:
-        write_releases_csv(args.csv, releases)
+    truncated = False
+    if key_state is not None:
+        releases, truncated = unreported_releases(all_releases, key_state, limit)
+        fetched_states[key_state.url] = key_state
+        if not releases:
+            for state in fetched_states.values():
+                save_feed_state(state)
+            if not args.json:
+                print("No new releases.")
+    elif limit is not None:
+        releases = releases[:limit]
+
+    if not releases:
+        return 0
 
     if args.json:
         print(releases_to_json(releases))
     else:
         print(format_releases_text(releases))
+    if args.csv:
+        write_releases_csv(args.csv, releases)
+    if args.history_db:
+        record_history(args.history_db, releases)
+
+    if key_state is not None:
+        # the cutoff only moves once the releases have been written out
+        for release in releases:
+            key_state.observe(release.published, (release.series, release.title, release.link))
+        if truncated:
+            # releases left out by --limit must not turn into a 304 next run
+            key_state.etag, key_state.last_modified = previous_validators
+            save_feed_state(key_state)
+        else:
+            for state in fetched_states.values():
+                save_feed_state(state)
     return 0
 
 
@@ -0,0 +1,284 @@
+"""Polling loop for the ``--watch`` mode of the RSS release scripts.
+
+Each watched feed has its own poll interval that adapts to how often it
+publishes: it tightens after a poll finds new items (towards the observed
+gap between new items) and backs off while the feed is quiet or failing.
+Feeds are polled concurrently on a small thread pool; results are handed
+back to the caller on the main thread, so the handler needs no locking.
+
+``run_watch`` is the ``--watch`` mode of both RSS scripts built on top of it;
+each script passes its own ``HttpClient`` and default feed mirrors.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from release_feeds import (
+    FeedState,
+    SeriesMatcher,
+    Release,
+    fetch_feed,
+    latest_cutoff,
+    load_feed_state,
+    load_releases,
+    published_before,
+    release_to_dict,
+    save_feed_state,
+    write_releases_csv,
+)
+from release_history import record_history
+
+DEFAULT_INTERVAL = 300.0
+DEFAULT_MIN_INTERVAL = 60.0
+DEFAULT_MAX_INTERVAL = 3600.0
+BACKOFF_FACTOR = 1.5
+CADENCE_SMOOTHING = 0.3  # weight of the newest gap in the moving average
+
+
+@dataclass
+class AdaptiveInterval:
+    current: float = DEFAULT_INTERVAL
+    minimum: float = DEFAULT_MIN_INTERVAL
+    maximum: float = DEFAULT_MAX_INTERVAL
+    cadence: Optional[float] = None  # smoothed seconds between polls that found new items
+    last_new_at: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        self.minimum = max(self.minimum, 1.0)
+        self.maximum = max(self.maximum, self.minimum)
+        self.current = self._clamp(self.current)
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, self.minimum), self.maximum)
+
+    def found_new(self, now: float) -> None:
+        if self.last_new_at is not None:
+            gap = now - self.last_new_at
+            self.cadence = gap if self.cadence is None else (
+                CADENCE_SMOOTHING * gap + (1 - CADENCE_SMOOTHING) * self.cadence
+            )
+        self.last_new_at = now
+        target = self.current / 2
+        if self.cadence is not None:
+            target = min(target, self.cadence / 2)
+        self.current = self._clamp(target)
+
+    def quiet(self) -> None:
+        self.current = self._clamp(self.current * BACKOFF_FACTOR)
+
+
+@dataclass(eq=False)
+class WatchedFeed:
+    """One polled feed; ``poll`` runs on a worker thread and may raise."""
+
+    name: str
+    poll: Callable[[], Any]
+    interval: AdaptiveInterval = field(default_factory=AdaptiveInterval)
+    polls: int = 0
+    next_due: float = 0.0
+
+
+def watch_feeds(
+    feeds: Sequence[WatchedFeed],
+    handle: Callable[[WatchedFeed, Any], Optional[int]],
+    workers: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> None:
+    """Poll ``feeds`` until ``stop`` is set (or KeyboardInterrupt).
+
+    ``handle(feed, result)`` is called on the calling thread with each poll
+    result and returns the number of new items found; ``None`` leaves the
+    interval unchanged (e.g. for a baseline poll). A poll that raises is
+    reported on stderr and counts as quiet.
+    """
+    if not feeds:
+        return
+    stop = stop or threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers or len(feeds))
+    running: Dict[Future, WatchedFeed] = {}
+    try:
+        while not stop.is_set():
+            now = clock()
+            busy = set(running.values())
+            for feed in feeds:
+                if feed not in busy and feed.next_due <= now:
+                    running[pool.submit(feed.poll)] = feed
+                    busy.add(feed)
+            idle = [feed.next_due for feed in feeds if feed not in busy]
+            timeout = max(min(idle) - now, 0.0) if idle else None
+            if not running:
+                stop.wait(timeout)
+                continue
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                feed = running.pop(future)
+                try:
+                    new_items = handle(feed, future.result())
+                except Exception as exc:  # keep watching the other feeds
+                    print(f"[watch] {feed.name}: {exc}", file=sys.stderr)
+                    new_items = 0
+                feed.polls += 1
+                if new_items:
+                    feed.interval.found_new(clock())
+                elif new_items is not None:
+                    feed.interval.quiet()
+                feed.next_due = clock() + feed.interval.current
+    finally:
+        for future in running:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+def post_ndjson(client, url: str, lines: Iterable[str], timeout: float = 15) -> None:
+    """POST ``lines`` as one ``application/x-ndjson`` body via an ``HttpClient``."""
+    body = "".join(line + "\n" for line in lines).encode("utf-8")
+    if not body:
+        return
+    response = client.session.post(
+        url,
+        data=body,
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+
+
+def run_watch(
+    args: argparse.Namespace,
+    series_matchers: SeriesMatcher,
+    client,
+    feed_candidates: Sequence[str],
+) -> int:
+    """Poll every watched feed until interrupted, emitting only new releases.
+
+    ``feed_candidates`` is the script's default feed followed by its mirrors.
+    Validators, the newest ``pubDate`` per feed and the keys already emitted
+    stay in memory between polls.
+    Without ``--since`` or saved ``--only-new`` state the first poll of each
+    feed is a silent baseline.
+
+    Releases count as emitted (and the cutoff and saved state move) only
+    after they were written out; when the webhook POST fails they are sent
+    again on the next poll. A failing ``--csv``/``--history-db`` write is
+    reported but does not resend them. Emitted keys older than every feed's
+    cutoff are forgotten, since no poll can return them any more.
+    """
+    states: Dict[str, FeedState] = {}
+    feed_states_by_url: Dict[str, Dict[str, FeedState]] = {}
+    emitted: Dict[Tuple[str, str, str], Optional[datetime]] = {}
+
+    def make_poll(url: str):
+        fallbacks: Sequence[str] = tuple(feed_candidates[1:]) if url == feed_candidates[0] else ()
+        for candidate in (url, *fallbacks):
+            if candidate not in states:
+                states[candidate] = load_feed_state(candidate) if args.only_new else FeedState(url=candidate)
+        feed_states = {candidate: states[candidate] for candidate in (url, *fallbacks)}
+        feed_states_by_url[url] = feed_states
+
+        def poll() -> Optional[List[Release]]:
+            feed_xml = fetch_feed(
+                client,
+                url,
+                fallbacks=fallbacks,
+                hedge_delay=args.hedge_delay,
+                remember=bool(fallbacks),
+                states=feed_states,
+            )
+            if feed_xml is None:
+                return None
+            return load_releases(
+                feed_xml,
+                series_matchers,
+                since=latest_cutoff(args.since, states[url].newest),
+                early_stop=not args.full_scan,
+            )
+
+        return poll
+
+    def handle(feed: WatchedFeed, releases: Optional[List[Release]]) -> Optional[int]:
+        if releases is None:  # 304 Not Modified
+            return 0
+        key_state = states[feed.name]
+        baseline = feed.polls == 0 and latest_cutoff(args.since, key_state.newest) is None
+        fresh = [
+            release
+            for release in releases
+            if (release.series, release.title, release.link) not in emitted
+            and not key_state.already_reported((release.series, release.title, release.link), release.published)
+        ]
+        if fresh and not baseline:
+            lines = [json.dumps(release_to_dict(release), ensure_ascii=False) for release in fresh]
+            try:
+                if args.webhook:
+                    post_ndjson(client, args.webhook, lines)
+                else:
+                    print("\n".join(lines), flush=True)
+            except Exception:
+                # not delivered: drop the validators so the next poll refetches the body
+                for state in feed_states_by_url[feed.name].values():
+                    state.etag = state.last_modified = None
+                raise
+        emitted.update(((release.series, release.title, release.link), release.published) for release in fresh)
+        for release in releases:
+            key_state.observe(release.published, (release.series, release.title, release.link))
+        if args.only_new:
+            for state in feed_states_by_url[feed.name].values():
+                save_feed_state(state)
+        forget_emitted()
+        if fresh and not baseline:
+            try:
+                if args.csv:
+                    write_releases_csv(args.csv, fresh)
+                if args.history_db:
+                    record_history(args.history_db, fresh)
+            except Exception as exc:  # already delivered: don't send them again
+                print(f"[watch] {feed.name}: could not record releases: {exc}", file=sys.stderr)
+        return None if baseline else len(fresh)
+
+    def forget_emitted() -> None:
+        cutoffs = [latest_cutoff(args.since, states[feed.name].newest) for feed in feeds]
+        if not cutoffs or None in cutoffs:
+            return
+        floor = cutoffs[0]
+        for cutoff in cutoffs[1:]:
+            if published_before(cutoff, floor):
+                floor = cutoff
+        for key, published in list(emitted.items()):
+            if published_before(published, floor):
+                del emitted[key]
+
+    feeds = [
+        WatchedFeed(
+            name=url,
+            poll=make_poll(url),
+            interval=AdaptiveInterval(args.interval, args.min_interval, args.max_interval),
+        )
+        for url in dict.fromkeys([args.feed_url, *args.watch_feed])
+    ]
+    try:
+        watch_feeds(feeds, handle)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+__all__ = [
+    "AdaptiveInterval",
+    "DEFAULT_INTERVAL",
+    "DEFAULT_MAX_INTERVAL",
+    "DEFAULT_MIN_INTERVAL",
+    "WatchedFeed",
+    "post_ndjson",
+    "run_watch",
+    "watch_feeds",
+]
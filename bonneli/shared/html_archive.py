@@ -0,0 +1,143 @@
+"""Append-only archive of fetched HTML pages.
+
+Every page body is stored gzip-compressed in a small SQLite file, keyed by
+URL and fetch time, so selectors can be fixed and fields re-extracted
+offline without touching the network again. Rows are only ever inserted.
+"""
+
+from __future__ import annotations
+
+import gzip
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+GZIP_LEVEL = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    fetched_at TEXT NOT NULL,
+    status INTEGER,
+    encoding TEXT,
+    codec TEXT NOT NULL DEFAULT 'gzip',
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_pages_url_fetched ON pages (url, fetched_at);
+"""
+
+
+@dataclass
+class ArchivedPage:
+    url: str
+    fetched_at: str
+    status: Optional[int]
+    encoding: Optional[str]
+    compressed: bytes
+
+    @property
+    def body(self) -> bytes:
+        return decompress(self.compressed)
+
+    @property
+    def text(self) -> str:
+        return decode_body(self.body, self.encoding)
+
+
+def compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress(blob: bytes) -> bytes:
+    return gzip.decompress(blob)
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> str:
+    return body.decode(encoding or "utf-8", errors="replace")
+
+
+class HtmlArchive:
+    """Thread-safe append-only page store backed by SQLite."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def append(
+        self,
+        url: str,
+        body: bytes,
+        encoding: Optional[str] = None,
+        status: Optional[int] = None,
+        fetched_at: Optional[str] = None,
+    ) -> None:
+        fetched_at = fetched_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        blob = compress(body)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages (url, fetched_at, status, encoding, codec, body) VALUES (?, ?, ?, ?, 'gzip', ?)",
+                (url, fetched_at, status, encoding, blob),
+            )
+            self._conn.commit()
+
+    def append_response(self, url: str, response) -> None:
+        """Archive a ``requests.Response`` as returned by the shared client."""
+        self.append(
+            url,
+            response.content,
+            encoding=response.encoding,
+            status=response.status_code,
+        )
+
+    def latest(self) -> Iterator[ArchivedPage]:
+        """Yield the most recent successful (2xx) copy of every URL (still compressed).
+
+        Error pages are archived too, but must never be re-parsed over good data.
+        """
+        cursor = self._conn.execute(
+            """
+            SELECT p.url, p.fetched_at, p.status, p.encoding, p.body
+            FROM pages p
+            JOIN (
+                SELECT url, MAX(fetched_at) AS fetched_at FROM pages
+                WHERE status BETWEEN 200 AND 299
+                GROUP BY url
+            ) m
+              ON p.url = m.url AND p.fetched_at = m.fetched_at
+            WHERE p.status BETWEEN 200 AND 299
+            ORDER BY p.url, p.id DESC
+            """
+        )
+        last_url = None
+        for url, fetched_at, status, encoding, blob in cursor:
+            if url == last_url:
+                continue
+            last_url = url
+            yield ArchivedPage(url, fetched_at, status, encoding, blob)
+
+    def history(self, url: str) -> Iterator[ArchivedPage]:
+        cursor = self._conn.execute(
+            "SELECT url, fetched_at, status, encoding, body FROM pages WHERE url = ? ORDER BY fetched_at, id",
+            (url,),
+        )
+        for row in cursor:
+            yield ArchivedPage(*row)
+
+
+__all__ = [
+    "ArchivedPage",
+    "HtmlArchive",
+    "compress",
+    "decode_body",
+    "decompress",
+]
@@ -0,0 +1,227 @@
+"""Shared pooled HTTP client used by the Bonelli / Veseli Cetvrtak scrapers.
+
+One ``requests.Session`` per client keeps connections alive between calls.
+Transient failures (connection errors, timeouts, 429 and 5xx) are retried
+with exponential backoff and full jitter, ``Retry-After`` is honoured, and a
+per-host circuit breaker makes a dead host fail fast instead of burning the
+whole timeout on every request. An optional per-host minimum interval gives
+all threads sharing a client one polite request budget per host. A ``cancel``
+event stops a request's remaining retries once nobody needs the answer.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+Timeout = Union[float, Tuple[float, float]]
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_TIMEOUT: Timeout = (5, 25)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_AFTER = 60.0
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MIN_INTERVAL = 0.0
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's circuit is open."""
+
+
+class RequestCancelled(requests.RequestException):
+    """Raised instead of the next attempt once the caller's ``cancel`` event is set."""
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: Optional[float] = None
+    probing: bool = False
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Return the delay in seconds encoded by a ``Retry-After`` header."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    current = now if now is not None else time.time()
+    return max(when.timestamp() - current, 0.0)
+
+
+class HttpClient:
+    """Thread-safe GET client with pooling, retries and per-host circuit breaking."""
+
+    def __init__(
+        self,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_after: float = DEFAULT_RESET_AFTER,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+    ) -> None:
+        self.timeout = timeout
+        self.min_interval = max(min_interval, 0.0)
+        self.retries = max(retries, 0)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_after = reset_after
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._circuits: Dict[str, _Circuit] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # --- circuit breaker ---
+
+    def _before_request(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            if circuit.opened_at is None:
+                return
+            if time.monotonic() - circuit.opened_at < self.reset_after or circuit.probing:
+                raise CircuitOpenError(f"Circuit open for {host}; skipping request")
+            # half-open: let exactly one probe through
+            circuit.probing = True
+
+    def _record_success(self, host: str) -> None:
+        with self._lock:
+            self._circuits[host] = _Circuit()
+
+    def _record_failure(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit())
+            circuit.failures += 1
+            if circuit.probing or circuit.failures >= self.failure_threshold:
+                circuit.opened_at = time.monotonic()
+            circuit.probing = False
+
+    def is_open(self, url: str) -> bool:
+        host = urlparse(url).netloc
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return bool(circuit and circuit.opened_at is not None)
+
+    # --- per-host request budget ---
+
+    def _throttle(self, host: str) -> None:
+        """Reserve the next request slot for ``host`` and wait for it."""
+        if not self.min_interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    # --- requests ---
+
+    def _sleep_before_retry(
+        self,
+        attempt: int,
+        retry_after: Optional[float],
+        cancel: Optional[threading.Event] = None,
+    ) -> None:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        if cancel is not None:
+            cancel.wait(delay)
+        else:
+            time.sleep(delay)
+
+    def get(
+        self,
+        url: str,
+        timeout: Optional[Timeout] = None,
+        cancel: Optional[threading.Event] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """GET ``url``; the final response is returned even for non-2xx statuses.
+
+        Raises ``CircuitOpenError`` when the host is known to be failing and the
+        last ``requests`` exception when every attempt failed at transport level.
+        Once ``cancel`` is set no further attempt is made (``RequestCancelled``).
+        """
+        host = urlparse(url).netloc
+        timeout = self.timeout if timeout is None else timeout
+        attempt = 0
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled(f"Request to {url} cancelled")
+            self._before_request(host)
+            self._throttle(host)
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record_failure(host)
+                if attempt >= self.retries or self.is_open(url):
+                    raise
+                self._sleep_before_retry(attempt, None, cancel)
+                attempt += 1
+                continue
+
+            if response.status_code not in RETRY_STATUSES:
+                self._record_success(host)
+                return response
+            if response.status_code >= 500:
+                self._record_failure(host)
+            else:
+                self._record_success(host)
+            if attempt >= self.retries or self.is_open(url):
+                return response
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.close()
+            self._sleep_before_retry(attempt, retry_after, cancel)
+            attempt += 1
+
+
+__all__ = [
+    "CircuitOpenError",
+    "HttpClient",
+    "RETRY_STATUSES",
+    "RequestCancelled",
+    "parse_retry_after",
+]
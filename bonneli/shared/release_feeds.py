@@ -0,0 +1,837 @@
+"""Feed helpers shared by the RSS release scripts.
+
+``hedged_fetch`` races the feed mirrors: the first candidate starts right
+away, the next one after ``hedge_delay`` seconds (or immediately when the
+previous attempt fails), and the first well-formed feed wins. The winning
+mirror is remembered on disk so the next run tries it first.
+
+``iter_feed_items`` streams ``<item>`` elements with ``iterparse`` and frees
+each one once the caller is done with it, so large feeds parse in bounded
+memory and callers can stop early.
+
+``SeriesMatcher`` compiles every series keyword into one regular expression,
+so a title is matched against a watch list of hundreds of aliases in a single
+pass.
+
+``ReleaseKeyIndex`` is the SQLite ``(series, title, link)`` index kept next
+to a ``--csv`` history file, so duplicate checks cost O(new items).
+
+``Release``, ``scan_page``/``load_releases`` and the output helpers
+(``release_to_dict``, ``format_releases_text``, ``write_releases_csv``) are
+shared by both scripts and the ``new_releases.py`` aggregator, as are
+``fetch_feed``, ``fetch_paged`` and ``build_series_matchers``; each script
+passes its own ``HttpClient`` and default series.
+
+``FeedState`` keeps per-feed-URL ``ETag``/``Last-Modified`` validators, the
+newest ``pubDate`` seen and the keys reported at exactly that ``pubDate``, so
+a run can send a conditional request and skip items it has already reported
+(feeds with date-only timestamps publish several items at the same instant).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import csv
+import io
+import os
+import queue
+import re
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from text_normalize import fold_text
+
+DEFAULT_HEDGE_DELAY = 2.0
+DEFAULT_PAGE_WORKERS = 4
+STATE_DIR = os.environ.get(
+    "BONELLI_FEED_STATE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "bonelli-feeds"),
+)
+MIRRORS_FILE = "mirrors.json"
+_mirrors_lock = threading.Lock()
+
+
+def _read_json(path: str) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_json(path: str, data: Dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def preferred_first(key: str, candidates: Sequence[str], state_dir: str = STATE_DIR) -> Tuple[str, ...]:
+    """Return ``candidates`` with the last winning mirror for ``key`` moved to the front."""
+    winner = _read_json(os.path.join(state_dir, MIRRORS_FILE)).get(key)
+    if winner not in candidates:
+        return tuple(candidates)
+    return (winner, *(url for url in candidates if url != winner))
+
+
+def remember_mirror(key: str, url: str, state_dir: str = STATE_DIR) -> None:
+    path = os.path.join(state_dir, MIRRORS_FILE)
+    with _mirrors_lock:  # feed pages may be fetched concurrently
+        mirrors = _read_json(path)
+        if mirrors.get(key) == url:
+            return
+        mirrors[key] = url
+        try:
+            _write_json(path, mirrors)
+        except OSError:
+            pass  # remembering the mirror is an optimisation only
+
+
+@dataclass
+class FeedState:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    newest_published: Optional[str] = None  # ISO 8601
+    # (series, title, link) of the releases reported at exactly newest_published
+    newest_keys: List[List[str]] = field(default_factory=list)
+
+    @property
+    def newest(self) -> Optional[datetime]:
+        if not self.newest_published:
+            return None
+        try:
+            return datetime.fromisoformat(self.newest_published)
+        except ValueError:
+            return None
+
+    def observe(self, published: Optional[datetime], key: Optional[ReleaseKey] = None) -> None:
+        if published is None:
+            return
+        current = self.newest
+        try:
+            is_newer = current is None or published > current
+        except TypeError:  # naive vs aware pubDate
+            return
+        if is_newer:
+            self.newest_published = published.isoformat()
+            self.newest_keys = []
+        elif published != current:
+            return
+        if key is not None and list(key) not in self.newest_keys:
+            self.newest_keys.append(list(key))
+
+    def already_reported(self, key: ReleaseKey, published: Optional[datetime]) -> bool:
+        """True for a release at exactly the newest ``pubDate`` that was already reported."""
+        return published is not None and published == self.newest and list(key) in self.newest_keys
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def parse_pub_date(raw: Optional[str]) -> Optional[datetime]:
+    if not raw:
+        return None
+    try:
+        return parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_cutoff(value: str) -> datetime:
+    """Parse a ``--since`` value (ISO date or datetime; naive means UTC)."""
+    cutoff = datetime.fromisoformat(value)
+    if cutoff.tzinfo is None:
+        cutoff = cutoff.replace(tzinfo=timezone.utc)
+    return cutoff
+
+
+def latest_cutoff(*cutoffs: Optional[datetime]) -> Optional[datetime]:
+    known = [cutoff for cutoff in cutoffs if cutoff is not None]
+    if not known:
+        return None
+    latest = known[0]
+    for cutoff in known[1:]:
+        if published_before(latest, cutoff):
+            latest = cutoff
+    return latest
+
+
+def iter_feed_items(feed_xml: bytes) -> Iterator[ET.Element]:
+    """Yield ``rss/channel/item`` elements as they close.
+
+    Each item is removed from the tree when the consumer asks for the next
+    one, so memory stays bounded by a single item.
+    """
+    stack: List[ET.Element] = []
+    for event, elem in ET.iterparse(io.BytesIO(feed_xml), events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == "item" and len(stack) == 2 and stack[1].tag == "channel":
+            yield elem
+            stack[1].remove(elem)
+
+
+class SeriesMatcher:
+    """Match normalized titles against ``{series: keywords}`` in one pass.
+
+    Keywords only match on word boundaries. When several keywords occur in a
+    title the longest one wins (so "martin mystere" beats "martin"); ties go
+    to the earliest occurrence, then to the series listed first.
+    """
+
+    def __init__(self, series_keywords: Mapping[str, Sequence[str]], word_boundary: bool = True) -> None:
+        self._owner: Dict[str, str] = {}
+        for series_name, keywords in series_keywords.items():
+            for keyword in keywords:
+                keyword = " ".join(keyword.split())
+                if keyword:
+                    self._owner.setdefault(keyword, series_name)
+        # longest first so the alternation prefers the longest keyword at a position
+        alternation = "|".join(
+            r"\s+".join(re.escape(part) for part in keyword.split())
+            for keyword in sorted(self._owner, key=len, reverse=True)
+        )
+        if not alternation:
+            self._pattern = None
+        elif word_boundary:
+            self._pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+        else:
+            self._pattern = re.compile(alternation)
+
+    def __len__(self) -> int:
+        return len(self._owner)
+
+    def match(self, normalized_title: str) -> Optional[str]:
+        """Return the series whose keyword best matches ``normalized_title``."""
+        if self._pattern is None:
+            return None
+        best: Optional[str] = None
+        for found in self._pattern.finditer(normalized_title):
+            keyword = " ".join(found.group(0).split())
+            if best is None or len(keyword) > len(best):
+                best = keyword
+        return self._owner[best] if best is not None else None
+
+
+def parse_series_file(path: str) -> Dict[str, Tuple[str, ...]]:
+    """Read a watch list: one ``Series Name[: alias, alias ...]`` per line.
+
+    Blank lines and ``#`` comments are ignored. The series name is always a
+    keyword of its own; keywords are returned as written (not normalized).
+    """
+    series: Dict[str, Tuple[str, ...]] = {}
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            name, _, aliases = line.partition(":")
+            name = name.strip()
+            keywords = [name, *(alias.strip() for alias in aliases.split(",") if alias.strip())]
+            series[name] = tuple(dict.fromkeys(series.get(name, ()) + tuple(keywords)))
+    return series
+
+
+def published_before(published: Optional[datetime], cutoff: Optional[datetime]) -> bool:
+    """True when ``published`` is known and strictly older than ``cutoff``.
+
+    Items published exactly at the cutoff are kept; ``FeedState.already_reported``
+    tells the ones reported before from new ones with the same timestamp.
+    """
+    if published is None or cutoff is None:
+        return False
+    try:
+        return published < cutoff
+    except TypeError:  # naive vs aware pubDate
+        return False
+
+
+@dataclass
+class Release:
+    series: str
+    title: str
+    link: str
+    published: Optional[datetime]
+    source: Optional[str] = None  # feed source name, set by the aggregator
+
+
+def extract_release(
+    item: ET.Element,
+    series_matchers: SeriesMatcher,
+    since: Optional[datetime] = None,
+) -> Optional[Release]:
+    title_elem = item.findtext("title") or ""
+    link_elem = item.findtext("link") or ""
+    published = parse_pub_date(item.findtext("pubDate"))
+    if published_before(published, since):
+        return None
+
+    series_name = series_matchers.match(fold_text(title_elem))
+    if series_name is None:
+        return None
+    return Release(
+        series=series_name,
+        title=title_elem.strip(),
+        link=link_elem.strip(),
+        published=published,
+    )
+
+
+def scan_page(
+    feed_xml: bytes,
+    series_matchers: SeriesMatcher,
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    early_stop: bool = True,
+) -> Tuple[List[Release], bool]:
+    """Return the feed page's matching releases and whether later pages can be skipped.
+
+    Once two dated items have shown the feed to be ordered newest-first,
+    parsing stops at the first item older than ``since`` or once ``limit``
+    matches are found. An out-of-order item (or ``early_stop=False``)
+    disables early stopping. Later pages are pointless when this page had no
+    items, only items older than ``since``, or (newest-first) reached the
+    ``since`` cutoff.
+    """
+    releases: List[Release] = []
+    in_order = early_stop
+    confirmed = False  # no early stop before the order has actually been seen
+    previous: Optional[datetime] = None
+    items = fresh = 0
+    reached_cutoff = False
+    for item in iter_feed_items(feed_xml):
+        items += 1
+        published = parse_pub_date(item.findtext("pubDate"))
+        if in_order and published is not None:
+            if previous is not None:
+                if published_before(previous, published):
+                    in_order = False
+                else:
+                    confirmed = True
+            previous = published
+        can_stop = in_order and confirmed
+        if can_stop and limit is not None and len(releases) >= limit:
+            break
+        if published_before(published, since):
+            if can_stop:
+                reached_cutoff = True
+                break
+            continue
+        fresh += 1
+        release = extract_release(item, series_matchers)
+        if release:
+            releases.append(release)
+    releases.sort(key=lambda rel: rel.published or datetime.min, reverse=True)
+    return releases, items == 0 or fresh == 0 or reached_cutoff
+
+
+def load_releases(
+    feed_xml: bytes,
+    series_matchers: SeriesMatcher,
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    early_stop: bool = True,
+) -> List[Release]:
+    """Stream matching releases out of the feed, newest first (see ``scan_page``)."""
+    return scan_page(feed_xml, series_matchers, since=since, limit=limit, early_stop=early_stop)[0]
+
+
+def unreported_releases(
+    releases: Sequence[Release],
+    state: FeedState,
+    limit: Optional[int] = None,
+) -> Tuple[List[Release], bool]:
+    """``--only-new``: drop what ``state`` already reported, then apply ``limit``.
+
+    ``releases`` is newest first. When ``limit`` cuts the list the *oldest*
+    unreported releases are kept, so the cutoff observed for them stays below
+    the ones left out and the next run reports those. Returns
+    ``(releases, truncated)``; a truncated run must not save the validators.
+    """
+    fresh = [
+        release
+        for release in releases
+        if not state.already_reported((release.series, release.title, release.link), release.published)
+    ]
+    if limit is None or len(fresh) <= limit:
+        return fresh, False
+    return (fresh[-limit:] if limit else []), True
+
+
+def with_paged(url: str, paged: int) -> str:
+    """``url`` with ``paged=N`` (WordPress feed pagination); page 1 is ``url`` itself."""
+    if paged <= 1:
+        return url
+    parsed = urlparse(url)
+    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
+    query["paged"] = str(paged)
+    new_query = urlencode(query, doseq=True)
+    return urlunparse(parsed._replace(query=new_query))
+
+
+def _state_path(url: str, state_dir: str) -> str:
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(state_dir, f"feed-{digest}.json")
+
+
+def load_feed_state(url: str, state_dir: str = STATE_DIR) -> FeedState:
+    data = _read_json(_state_path(url, state_dir))
+    if data.get("url") != url:
+        return FeedState(url=url)
+    return FeedState(
+        url=url,
+        etag=data.get("etag"),
+        last_modified=data.get("last_modified"),
+        newest_published=data.get("newest_published"),
+        newest_keys=[list(key) for key in data.get("newest_keys") or ()],
+    )
+
+
+def save_feed_state(state: FeedState, state_dir: str = STATE_DIR) -> None:
+    try:
+        _write_json(_state_path(state.url, state_dir), asdict(state))
+    except OSError:
+        pass
+
+
+ReleaseKey = Tuple[str, str, str]
+
+
+class ReleaseKeyIndex:
+    """Key index for a release history CSV, stored in ``<csv>.keys.db``.
+
+    The CSV's size and mtime are recorded after every append; if they no
+    longer match (the file was edited by hand or an append was interrupted)
+    the index is rebuilt from the CSV in one streaming pass.
+    """
+
+    def __init__(self, csv_path: str) -> None:
+        self.csv_path = csv_path
+        self.path = csv_path + ".keys.db"
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS release_keys (
+                series TEXT NOT NULL, title TEXT NOT NULL, link TEXT NOT NULL,
+                PRIMARY KEY (series, title, link)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            """
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ReleaseKeyIndex":
+        self.sync()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _csv_signature(self) -> str:
+        try:
+            stat = os.stat(self.csv_path)
+        except OSError:
+            return ""
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def sync(self) -> None:
+        """Rebuild the index if the CSV changed behind its back."""
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'csv'").fetchone()
+        signature = self._csv_signature()
+        if row and row[0] == signature:
+            return
+        with self._conn:
+            self._conn.execute("DELETE FROM release_keys")
+            if signature:
+                with open(self.csv_path, "r", encoding="utf-8", newline="") as csvfile:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO release_keys (series, title, link) VALUES (?, ?, ?)",
+                        (
+                            (row.get("series", "") or "", row.get("title", "") or "", row.get("link", "") or "")
+                            for row in csv.DictReader(csvfile)
+                        ),
+                    )
+            self._store_signature()
+
+    def _store_signature(self) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('csv', ?)", (self._csv_signature(),)
+        )
+
+    def __contains__(self, key: ReleaseKey) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM release_keys WHERE series = ? AND title = ? AND link = ?", key
+        ).fetchone() is not None
+
+    def add(self, keys: Sequence[ReleaseKey]) -> None:
+        """Record keys just appended to the CSV (call after the CSV write)."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO release_keys (series, title, link) VALUES (?, ?, ?)", keys
+            )
+            self._store_signature()
+
+
+def is_well_formed_feed(feed_xml: bytes) -> bool:
+    """Cheap RSS check: parse only up to the ``<channel>`` start tag.
+
+    The body is parsed in full once, by ``iter_feed_items``; a feed that
+    breaks off after ``<channel>`` surfaces there as ``ET.ParseError``.
+    """
+    depth = 0
+    try:
+        for event, elem in ET.iterparse(io.BytesIO(feed_xml), events=("start", "end")):
+            if event == "end":
+                depth -= 1
+                continue
+            depth += 1
+            if depth == 2 and elem.tag == "channel":
+                return True
+    except ET.ParseError:
+        return False
+    return False
+
+
+_NOT_MODIFIED = object()
+
+
+def hedged_fetch(
+    client,
+    candidates: Sequence[str],
+    timeout: Optional[float] = None,
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    states: Optional[Mapping[str, FeedState]] = None,
+) -> Tuple[int, Optional[bytes]]:
+    """Fetch the first well-formed feed among ``candidates``.
+
+    Returns ``(index, body)`` of the winning candidate. Once a winner is
+    found the attempts still in flight are cancelled: they make no further
+    retries, skip reading the body and close their responses. Attempts not
+    yet started are never issued.
+
+    With ``states`` (keyed by candidate URL) requests are conditional: a
+    ``304 Not Modified`` wins with ``body=None``, and the validators of the
+    winning response (only) are copied into its state (the caller saves it).
+    """
+    states = states or {}
+    if not candidates:
+        raise RuntimeError("No feed URLs to fetch")
+    results: "queue.Queue[Tuple[int, Optional[bytes], str, Dict[str, Optional[str]]]]" = queue.Queue()
+    done = threading.Event()
+
+    def attempt(index: int) -> None:
+        url = candidates[index]
+        if done.is_set():
+            return
+        state = states.get(url)
+        headers = state.conditional_headers() if state else {}
+        try:
+            response = client.get(url, timeout=timeout, headers=headers, cancel=done, stream=True)
+        except Exception as exc:
+            results.put((index, None, str(exc), {}))
+            return
+        with response:
+            if done.is_set():
+                return
+            if response.status_code == 304 and headers:
+                results.put((index, _NOT_MODIFIED, "", {}))
+            elif response.status_code >= 400:
+                results.put((index, None, f"HTTP {response.status_code} {response.reason or ''}".rstrip(), {}))
+            elif not is_well_formed_feed(response.content):
+                results.put((index, None, "response is not a well-formed RSS feed", {}))
+            else:
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                results.put((index, response.content, "", validators))
+
+    def start(index: int) -> None:
+        threading.Thread(target=attempt, args=(index,), daemon=True).start()
+
+    errors: List[str] = []
+    started = 1
+    start(0)
+    while len(errors) < len(candidates):
+        wait = max(hedge_delay, 0) if started < len(candidates) else None
+        try:
+            index, body, error, validators = results.get(timeout=wait)
+        except queue.Empty:
+            start(started)
+            started += 1
+            continue
+        if body is _NOT_MODIFIED:
+            done.set()
+            return index, None
+        if body is not None:
+            done.set()
+            state = states.get(candidates[index])
+            if state is not None:
+                state.etag = validators["etag"]
+                state.last_modified = validators["last_modified"]
+            return index, body
+        errors.append(f"{candidates[index]} -> {error}")
+        if started < len(candidates):
+            # a failure hedges immediately instead of waiting out the delay
+            start(started)
+            started += 1
+    raise RuntimeError("All feed URLs failed:\n" + "\n".join(errors))
+
+
+def fetch_feed(
+    client,
+    url: str,
+    timeout: Optional[float] = None,
+    fallbacks: Sequence[str] = (),
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    remember: bool = False,
+    states: Optional[Mapping[str, FeedState]] = None,
+) -> Optional[bytes]:
+    """Fetch the first well-formed feed with ``client``, hedging across ``fallbacks``.
+
+    With ``remember`` the mirror that won last time (for this ``url``) is
+    tried first, and the new winner is stored for the next run. With
+    ``states`` the requests are conditional and ``None`` means 304.
+    """
+    candidates: Sequence[str] = (url, *fallbacks)
+    if remember:
+        candidates = preferred_first(url, candidates)
+    index, feed_xml = hedged_fetch(
+        client,
+        candidates,
+        timeout=timeout,
+        hedge_delay=hedge_delay,
+        states=states,
+    )
+    if remember:
+        remember_mirror(url, candidates[index])
+    return feed_xml
+
+
+def fetch_paged(
+    client,
+    url: str,
+    pages: int,
+    series_matchers: SeriesMatcher,
+    fallbacks: Sequence[str] = (),
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    early_stop: bool = True,
+    hedge_delay: float = DEFAULT_HEDGE_DELAY,
+    workers: int = DEFAULT_PAGE_WORKERS,
+    state_for: Optional[Callable[[str], FeedState]] = None,
+) -> Tuple[Optional[List[Release]], List[str]]:
+    """Fetch up to ``pages`` pages of a ``?paged=N`` feed and merge their releases.
+
+    Pages are fetched through a bounded window of ``workers`` but merged
+    strictly in page order; once a page shows the feed is exhausted (see
+    ``scan_page``) no further pages are issued. ``fallbacks`` are the mirror
+    base URLs, paged the same way. With ``state_for`` (URL -> ``FeedState``)
+    the requests are conditional.
+
+    Returns ``(releases, errors)``: ``releases`` is ``None`` when page 1 was
+    not modified, ``errors`` lists the later pages that failed. A failing
+    page 1 raises.
+    """
+    pages = max(pages, 1)
+    releases: List[Release] = []
+    errors: List[str] = []
+    seen = set()
+
+    def fetch_page(page: int) -> "Future[Optional[bytes]]":
+        page_url = with_paged(url, page)
+        page_fallbacks = tuple(with_paged(fallback, page) for fallback in fallbacks)
+        states = None
+        if state_for is not None:
+            states = {candidate: state_for(candidate) for candidate in (page_url, *page_fallbacks)}
+        return pool.submit(
+            fetch_feed,
+            client,
+            page_url,
+            fallbacks=page_fallbacks,
+            hedge_delay=hedge_delay,
+            remember=bool(page_fallbacks),
+            states=states,
+        )
+
+    workers = min(max(workers, 1), pages)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending: Dict[int, "Future[Optional[bytes]]"] = {}
+    next_page = 1
+    try:
+        for page in range(1, pages + 1):
+            while next_page <= pages and len(pending) < workers:
+                pending[next_page] = fetch_page(next_page)
+                next_page += 1
+            try:
+                feed_xml = pending.pop(page).result()
+            except Exception as exc:
+                if page == 1:
+                    raise
+                errors.append(f"page {page}: {exc}")
+                continue
+            if feed_xml is None:
+                if page == 1:
+                    return None, errors
+                continue
+            page_releases, exhausted = scan_page(
+                feed_xml,
+                series_matchers,
+                since=since,
+                limit=limit,
+                early_stop=early_stop,
+            )
+            for release in page_releases:
+                key = (release.series, release.title, release.link)
+                if key not in seen:
+                    seen.add(key)
+                    releases.append(release)
+            if exhausted:
+                break
+    finally:
+        # Python 3.8 has no cancel_futures: cancel the pages not started yet
+        for future in pending.values():
+            future.cancel()
+        pool.shutdown(wait=False)
+    return releases, errors
+
+
+def build_series_matchers(
+    default_series: Mapping[str, Sequence[str]],
+    series_overrides: Optional[Sequence[str]],
+    series_file: Optional[str] = None,
+) -> SeriesMatcher:
+    """Compile the watch list (``--series`` plus ``--series-file``) once."""
+    watch_list: Dict[str, Sequence[str]] = {}
+    if series_file:
+        watch_list.update(parse_series_file(series_file))
+    for series in series_overrides or ():
+        watch_list.setdefault(series, (series,))
+    if not watch_list:
+        watch_list = dict(default_series)
+    return SeriesMatcher(
+        {series: tuple(fold_text(keyword) for keyword in keywords) for series, keywords in watch_list.items()}
+    )
+
+
+def release_to_dict(release: Release) -> Dict[str, Optional[str]]:
+    payload = {
+        "series": release.series,
+        "title": release.title,
+        "link": release.link,
+        "published": release.published.isoformat() if release.published else None,
+    }
+    if release.source:
+        payload["source"] = release.source
+    return payload
+
+
+def releases_to_json(releases: Sequence[Release]) -> str:
+    payload = [release_to_dict(release) for release in releases]
+    return json.dumps(payload, indent=2, ensure_ascii=False)
+
+
+def format_releases_text(releases: Sequence[Release]) -> str:
+    lines = []
+    for release in releases:
+        date_part = release.published.strftime("%Y/%m/%d") if release.published else "Unknown date"
+        source_part = f"{release.source} | " if release.source else ""
+        lines.append(f"{date_part} | {source_part}{release.series} | {release.title} | {release.link}")
+    return "\n".join(lines)
+
+
+def write_releases_csv(path: str, releases: Iterable[Release]) -> None:
+    """Append releases to CSV with a fetched timestamp, skipping duplicates.
+
+    Duplicates are checked against the ``<csv>.keys.db`` index instead of
+    re-reading the whole history on every run.
+    """
+    dir_name = os.path.dirname(os.path.abspath(path))
+    if dir_name and not os.path.exists(dir_name):
+        os.makedirs(dir_name, exist_ok=True)
+
+    fieldnames = ("fetched_at", "series", "title", "link", "published")
+    with ReleaseKeyIndex(path) as key_index:
+        run_timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        new_keys = set()
+        new_rows = []
+        for release in releases:
+            key = (release.series, release.title, release.link)
+            if key in new_keys or key in key_index:
+                continue
+            new_keys.add(key)
+            new_rows.append(
+                {
+                    "fetched_at": run_timestamp,
+                    "series": release.series,
+                    "title": release.title,
+                    "link": release.link,
+                    "published": release.published.isoformat() if release.published else "",
+                }
+            )
+
+        if not new_rows:
+            return
+
+        file_exists = os.path.exists(path)
+        with open(path, "a", encoding="utf-8", newline="") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            if not file_exists or os.path.getsize(path) == 0:
+                writer.writeheader()
+            writer.writerows(new_rows)
+        key_index.add(list(new_keys))
+
+
+__all__ = [
+    "DEFAULT_HEDGE_DELAY",
+    "DEFAULT_PAGE_WORKERS",
+    "FeedState",
+    "Release",
+    "ReleaseKeyIndex",
+    "STATE_DIR",
+    "SeriesMatcher",
+    "build_series_matchers",
+    "extract_release",
+    "fetch_feed",
+    "fetch_paged",
+    "format_releases_text",
+    "hedged_fetch",
+    "is_well_formed_feed",
+    "iter_feed_items",
+    "latest_cutoff",
+    "load_feed_state",
+    "load_releases",
+    "parse_cutoff",
+    "parse_pub_date",
+    "parse_series_file",
+    "preferred_first",
+    "published_before",
+    "release_to_dict",
+    "releases_to_json",
+    "remember_mirror",
+    "save_feed_state",
+    "scan_page",
+    "unreported_releases",
+    "with_paged",
+    "write_releases_csv",
+]
@@ -0,0 +1,241 @@
+"""SQLite release history for the RSS release scripts.
+
+Same columns as the ``--csv`` history (``fetched_at, series, title, link,
+published``), one row per ``(series, title, link)``, with ``published``
+stored as UTC ISO 8601 so date ranges and months are answered from the
+``(series, published)`` and ``(published)`` indexes. ``history_main`` is the
+``history`` subcommand shared by both scripts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+INSERT_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS releases (
+    fetched_at TEXT NOT NULL,
+    series TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    published TEXT,
+    UNIQUE (series, title, link)
+);
+CREATE INDEX IF NOT EXISTS ix_releases_series_published ON releases (series, published);
+CREATE INDEX IF NOT EXISTS ix_releases_published ON releases (published);
+"""
+
+Row = Tuple[str, str, str, str, Optional[str]]
+
+
+def to_utc_iso(published: Optional[datetime]) -> Optional[str]:
+    if published is None:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def _iso_or_none(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return to_utc_iso(datetime.fromisoformat(value))
+    except ValueError:
+        return None
+
+
+def _batched(rows: Iterable[Row], size: int) -> Iterator[List[Row]]:
+    batch: List[Row] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ReleaseHistory:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ReleaseHistory":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_rows(self, rows: Iterable[Row], batch_size: int = INSERT_BATCH_SIZE) -> int:
+        """Insert ``(fetched_at, series, title, link, published)`` rows; duplicates are skipped."""
+        before = self._conn.total_changes
+        with self._conn:
+            for batch in _batched(rows, batch_size):
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO releases (fetched_at, series, title, link, published) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    batch,
+                )
+        return self._conn.total_changes - before
+
+    def add_releases(self, releases: Iterable, fetched_at: Optional[str] = None) -> int:
+        """Insert objects with ``series``/``title``/``link``/``published`` attributes."""
+        fetched_at = fetched_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        return self.add_rows(
+            (fetched_at, release.series, release.title, release.link, to_utc_iso(release.published))
+            for release in releases
+        )
+
+    def import_csv(self, csv_path: str) -> int:
+        with open(csv_path, "r", encoding="utf-8", newline="") as csvfile:
+            return self.add_rows(
+                (
+                    row.get("fetched_at") or "",
+                    row.get("series") or "",
+                    row.get("title") or "",
+                    row.get("link") or "",
+                    _iso_or_none(row.get("published")),
+                )
+                for row in csv.DictReader(csvfile)
+            )
+
+    def latest_per_series(self) -> List[sqlite3.Row]:
+        return self._conn.execute(
+            """
+            SELECT r.* FROM releases r
+            JOIN (SELECT series, MAX(published) AS published FROM releases GROUP BY series) m
+              ON r.series = m.series AND r.published = m.published
+            ORDER BY r.series, r.title
+            """
+        ).fetchall()
+
+    def between(
+        self, start: Optional[str] = None, end: Optional[str] = None, series: Optional[str] = None
+    ) -> List[sqlite3.Row]:
+        """Releases with ``start <= published < end`` (UTC ISO bounds), newest first."""
+        clauses = ["published IS NOT NULL"]
+        params: List[str] = []
+        if series:
+            clauses.append("series = ?")
+            params.append(series)
+        if start:
+            clauses.append("published >= ?")
+            params.append(start)
+        if end:
+            clauses.append("published < ?")
+            params.append(end)
+        return self._conn.execute(
+            f"SELECT * FROM releases WHERE {' AND '.join(clauses)} ORDER BY published DESC",
+            params,
+        ).fetchall()
+
+    def counts_per_month(self, series: Optional[str] = None) -> List[sqlite3.Row]:
+        where = "WHERE published IS NOT NULL" + (" AND series = ?" if series else "")
+        return self._conn.execute(
+            f"""
+            SELECT substr(published, 1, 7) AS month, series, COUNT(*) AS releases
+            FROM releases {where}
+            GROUP BY month, series
+            ORDER BY month DESC, series
+            """,
+            (series,) if series else (),
+        ).fetchall()
+
+
+def record_history(path: str, releases: Iterable) -> None:
+    """Insert releases into the SQLite history in one batched transaction."""
+    dir_name = os.path.dirname(os.path.abspath(path))
+    if dir_name and not os.path.exists(dir_name):
+        os.makedirs(dir_name, exist_ok=True)
+    with ReleaseHistory(path) as history:
+        history.add_releases(releases)
+
+
+def _bound(value: str) -> str:
+    """argparse type for ``--from``/``--to``: ISO date/datetime -> UTC ISO bound."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date/datetime: {value!r}")
+    return to_utc_iso(parsed) or value
+
+
+def parse_history_args(prog: str, argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog=f"{prog} history", description="Query the SQLite release history.")
+    parser.add_argument("--db", required=True, help="Release history database (see --history-db).")
+    parser.add_argument("--json", action="store_true", help="Output JSON instead of text.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("latest", help="Latest release of every series.")
+    range_parser = commands.add_parser("range", help="Releases published in a date range.")
+    range_parser.add_argument(
+        "--from",
+        dest="start",
+        type=_bound,
+        help="Inclusive ISO date/datetime (naive means UTC).",
+    )
+    range_parser.add_argument(
+        "--to",
+        dest="end",
+        type=_bound,
+        help="Exclusive ISO date/datetime (naive means UTC).",
+    )
+    range_parser.add_argument("--series", help="Only this series.")
+    monthly_parser = commands.add_parser("monthly", help="Release counts per month and series.")
+    monthly_parser.add_argument("--series", help="Only this series.")
+    import_parser = commands.add_parser("import-csv", help="Load an existing --csv history file.")
+    import_parser.add_argument("csv_path")
+    return parser.parse_args(argv)
+
+
+def _format_rows(rows: Sequence[sqlite3.Row], as_json: bool) -> str:
+    if as_json:
+        return json.dumps([dict(row) for row in rows], indent=2, ensure_ascii=False)
+    lines = []
+    for row in rows:
+        if "month" in row.keys():
+            lines.append(f"{row['month']} | {row['series']} | {row['releases']}")
+        else:
+            date_part = (row["published"] or "")[:10].replace("-", "/") or "Unknown date"
+            lines.append(f"{date_part} | {row['series']} | {row['title']} | {row['link']}")
+    return "\n".join(lines)
+
+
+def history_main(prog: str, argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_history_args(prog, argv)
+    with ReleaseHistory(args.db) as history:
+        if args.command == "import-csv":
+            added = history.import_csv(args.csv_path)
+            print(f"Imported {added} new releases into {args.db}.")
+            return 0
+        if args.command == "latest":
+            rows = history.latest_per_series()
+        elif args.command == "range":
+            rows = history.between(args.start, args.end, series=args.series)
+        else:
+            rows = history.counts_per_month(series=args.series)
+    output = _format_rows(rows, args.json)
+    if output:
+        print(output)
+    return 0
+
+
+__all__ = [
+    "INSERT_BATCH_SIZE",
+    "ReleaseHistory",
+    "history_main",
+    "record_history",
+    "to_utc_iso",
+]
@@ -0,0 +1,153 @@
+"""Text normalization shared by the scrapers, the RSS scripts and the vc app.
+
+Scraped pages repeat the same short strings (series names, tag labels, issue
+numbers, dates) thousands of times, so the patterns are compiled once and the
+pure helpers are memoized with bounded LRU caches. ``try_parse_date`` parses
+the ``dd.mm.yyyy.`` forms by hand instead of trying ``strptime`` formats in a
+loop. ``benchmarks/text_normalize.py`` compares them with the old versions.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from datetime import date
+from functools import lru_cache
+from typing import Optional, Tuple
+
+CACHE_SIZE = 4096
+
+_WHITESPACE = re.compile(r"\s+")
+# ignorisi "-30%" i slične badge-ove; izbegni brojeve odmah posle % ili '-'
+# dozvoli formate: "Zagor 123", "Zagor #123", "br. 123", "Zagor 123: Naslov"
+_TITLE_ISSUE = re.compile(r"(?<![%\-])\s*(?:br\.?|#)?\s*(\d{1,4})(?=[^\d]|$)", re.IGNORECASE)
+
+_TAG_LABELS = {
+    "n": "Broj",
+    "no": "Broj",
+    "numero": "Broj",
+    "num": "Broj",
+    "uscita": "Uscita",
+    "periodicita": "Periodicita",
+    "prezzo": "Prezzo",
+}
+
+
+def normalize_space(text: Optional[str]) -> str:
+    """Collapse runs of whitespace to one space and strip the ends."""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def clean_text(x: Optional[str]) -> Optional[str]:
+    if x is None:
+        return None
+    return _WHITESPACE.sub(" ", x).strip()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def strip_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fold_text(text: str) -> str:
+    """Lowercase ASCII approximation for consistent string matching."""
+    return strip_accents(text).lower()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_tag_label(raw_label: str) -> Optional[str]:
+    label = normalize_space(raw_label).strip(" :")
+    if not label:
+        return None
+    label = label.replace("°", "").replace("º", "")
+    label = normalize_space(strip_accents(label))
+    return _TAG_LABELS.get(label.lower(), label)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_issue_number(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if value.isdigit():
+        try:
+            number = int(value)
+        except ValueError:
+            return value
+        if number == 0:
+            return None
+        return str(number)
+    return value
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_title_and_broj(raw_title: str) -> Tuple[str, Optional[str]]:
+    """
+    Pokušava da izdvoji broj iz naslova, npr:
+    'Zagor 100: Naslov' -> broj='100', naslov='Zagor 100: Naslov' (ili očistiti po želji)
+    Ako je format 'Zagor #25 – ' i sl., hvata najčešće slučajeve.
+    """
+    if not raw_title:
+        return "", None
+    m = _TITLE_ISSUE.search(raw_title)
+    broj = normalize_issue_number(m.group(1)) if m else None
+    return raw_title.strip(), broj
+
+
+def _two_digit_year(year: int) -> int:
+    # isto kao strptime %y: 69-99 -> 19xx, 00-68 -> 20xx
+    return year + (1900 if year >= 69 else 2000)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def try_parse_date(s: Optional[str]) -> Optional[date]:
+    """Parse ``dd.mm.yyyy.``, ``dd. mm. yyyy``, ``yyyy-mm-dd`` and ``dd.mm.yy``."""
+    s = (s or "").strip().strip(".")
+    if not s.isascii():
+        return None
+    s = _WHITESPACE.sub("", s)  # "23. 10. 2025." -> "23.10.2025"
+    parts = s.split(".")
+    if len(parts) == 3:
+        day, month, year = parts
+        if not (day.isdigit() and month.isdigit() and year.isdigit()) or len(day) > 2 or len(month) > 2:
+            return None
+        if len(year) == 4:
+            full_year = int(year)
+        elif len(year) == 2:
+            full_year = _two_digit_year(int(year))
+        else:
+            return None
+        try:
+            return date(full_year, int(month), int(day))
+        except ValueError:
+            return None
+    parts = s.split("-")
+    if len(parts) == 3:
+        year, month, day = parts
+        if not (year.isdigit() and month.isdigit() and day.isdigit()):
+            return None
+        if len(year) != 4 or len(month) > 2 or len(day) > 2:
+            return None
+        try:
+            return date(int(year), int(month), int(day))
+        except ValueError:
+            return None
+    return None
+
+
+__all__ = [
+    "CACHE_SIZE",
+    "clean_text",
+    "fold_text",
+    "normalize_issue_number",
+    "normalize_space",
+    "normalize_tag_label",
+    "parse_title_and_broj",
+    "strip_accents",
+    "try_parse_date",
+]
@@ -0,0 +1,106 @@
+"""In-memory trigram index for fuzzy title lookup.
+
+Titles are folded to lowercase ASCII, punctuation is dropped and issue
+numbers lose leading zeros ("Martin Mystère n. 012" and "MARTIN MYSTERE #12"
+normalize alike). Every word is padded like ``pg_trgm`` does ("  zagor ") and
+cut into trigrams; an inverted index maps each trigram to the titles that
+contain it, so a lookup only touches titles sharing at least one trigram and
+ranks them by trigram similarity (Jaccard). Not thread-safe on its own;
+callers serialise updates.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Hashable, List, Set, Tuple
+
+from text_normalize import CACHE_SIZE, fold_text
+
+DEFAULT_MIN_SCORE = 0.3
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+# oznake broja ispred cifara: "br. 12", "n. 12", "no 12", "#12"
+_ISSUE_MARKERS = frozenset({"br", "n", "no", "nr", "num", "numero"})
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_title(title: str) -> str:
+    words = []
+    for word in _NON_WORD.sub(" ", fold_text(title or "")).split():
+        if word.isdigit():
+            word = str(int(word))
+        elif word in _ISSUE_MARKERS:
+            continue
+        words.append(word)
+    return " ".join(words)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def title_trigrams(title: str) -> FrozenSet[str]:
+    grams: Set[str] = set()
+    for word in normalize_title(title).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    def __init__(self) -> None:
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._grams: Dict[Hashable, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._grams)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._grams
+
+    def add(self, key: Hashable, title: str) -> None:
+        """Index ``title`` under ``key`` (replacing what ``key`` had)."""
+        self.remove(key)
+        grams = title_trigrams(title or "")
+        if not grams:
+            return
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings[gram].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        grams = self._grams.pop(key, None)
+        if not grams:
+            return
+        for gram in grams:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def search(self, title: str, limit: int = 10, min_score: float = DEFAULT_MIN_SCORE) -> List[Tuple[Hashable, float]]:
+        """Return up to ``limit`` ``(key, similarity)`` pairs, best first."""
+        query = title_trigrams(title or "")
+        if not query:
+            return []
+        shared: Dict[Hashable, int] = defaultdict(int)
+        for gram in query:
+            for key in self._postings.get(gram, ()):
+                shared[key] += 1
+        scored = (
+            (key, count / (len(query) + len(self._grams[key]) - count))
+            for key, count in shared.items()
+        )
+        return heapq.nlargest(
+            limit,
+            (item for item in scored if item[1] >= min_score),
+            key=lambda item: item[1],
+        )
+
+
+__all__ = [
+    "DEFAULT_MIN_SCORE",
+    "TrigramIndex",
+    "normalize_title",
+    "title_trigrams",
+]
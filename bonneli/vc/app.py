@@ -1,19 +1,37 @@
+import argparse
+import csv
+import gzip
+import json
+import multiprocessing
+import os
+import queue
 import re
-import time
+import sys
+import threading
 import io
+import zlib
 import requests
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse, parse_qsl, urlencode
-from fastapi import FastAPI, Response, HTTPException, Query, Body
+from fastapi import FastAPI, Response, HTTPException, Query, Body, File, UploadFile
 from fastapi.responses import StreamingResponse, JSONResponse
 
-from bs4 import BeautifulSoup
-from sqlalchemy import create_engine, Column, Integer, String, Date, Text, select, UniqueConstraint
+from sqlalchemy import create_engine, Column, Integer, String, Date, DateTime, Text, select, func, or_, and_, UniqueConstraint, Index
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy import delete
-import pandas as pd
-from slugify import slugify
+
+# bs4, pandas i slugify se uvoze tek kad zatrebaju (parsiranje, export) -> brz start workera
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from http_client import HttpClient  # noqa: E402
+from title_index import DEFAULT_MIN_SCORE, TrigramIndex  # noqa: E402
+from text_normalize import clean_text, normalize_issue_number, parse_title_and_broj, try_parse_date  # noqa: E402
+from html_archive import HtmlArchive, decode_body, decompress  # noqa: E402
 
 
 BASE_URL = "https://veselicetvrtak.com"
@@ -78,6 +96,33 @@ EDITIONS = {
 DEFAULT_EDITION_SLUG = "zagor-redovna-serija"
 DEFAULT_EDICIJA = EDITIONS[DEFAULT_EDITION_SLUG]["name"]
 DEFAULT_IZDAVAC = "Veseli Četvrtak"  # fallback ako ne nađemo na stranici
+HTML_ARCHIVE_PATH = os.environ.get("HTML_ARCHIVE_PATH", "html_archive.db")
+REPARSE_BATCH_SIZE = 200
+BONELLI_IMPORT_BATCH_SIZE = 500
+BONELLI_BASE_COLUMNS = ("series", "title", "url")
+# pipeline za /scrape: fetch (niti) -> parse (procesi) -> jedan writer
+SCRAPE_FETCH_WORKERS = int(os.environ.get("SCRAPE_FETCH_WORKERS", "4"))
+SCRAPE_PARSE_WORKERS = int(os.environ.get("SCRAPE_PARSE_WORKERS", str(os.cpu_count() or 2)))
+SCRAPE_QUEUE_SIZE = int(os.environ.get("SCRAPE_QUEUE_SIZE", "32"))
+SCRAPE_BATCH_SIZE = int(os.environ.get("SCRAPE_BATCH_SIZE", "50"))
+SCRAPE_REQUEST_DELAY = 0.6
+SCRAPE_QUEUE_POLL = 0.5  # koliko često blokirani stage proverava da li je writer odustao
+CHANGES_PAGE_SIZE = 1000
+COMICS_DUMP_FETCH_SIZE = 1000
+COMICS_LOAD_BATCH_SIZE = 500  # i broj parametara u IN (...) upitu po batch-u
+DUMP_GZIP_LEVEL = 6
+CHANGES_MAX_PAGE_SIZE = 10000
+# kolone Comic koje prati dnevnik promena (comic_changes)
+COMIC_TRACKED_COLUMNS = (
+    "edicija",
+    "naslov",
+    "broj",
+    "datum_objavljivanja",
+    "broj_originala",
+    "naslov_originala",
+    "opis",
+    "izdavac",
+)
 
 # --- DB setup ---
 Base = declarative_base()
@@ -99,20 +144,91 @@ class Comic(Base):
 
     __table_args__ = (UniqueConstraint("url", name="uq_comic_url"),)
 
-Base.metadata.create_all(engine)
 
-app = FastAPI(title="Strip Scraper", version="0.1")
+class BonelliIssue(Base):
+    """Italijanski original iz CSV-a koji pravi scripts/bonneli_scrape.py."""
+    __tablename__ = "bonelli_issues"
+    id = Column(Integer, primary_key=True)
+    series = Column(String(255), nullable=False)
+    issue_no = Column(String(128), nullable=True)
+    title = Column(String(512), nullable=False)
+    url = Column(String(1024), nullable=False)
+    release = Column(String(64), nullable=True)
+    tags = Column(Text, nullable=True)  # JSON ostalih tag kolona (Periodicita, Prezzo, ...)
+
+    __table_args__ = (
+        UniqueConstraint("url", name="uq_bonelli_url"),
+        # Comic.broj_originala -> original: indeksirani lookup po (serija, broj)
+        Index("ix_bonelli_series_issue", "series", "issue_no"),
+    )
+
+class BonelliImport(Base):
+    """Jedan red po importu Bonelli kataloga -> max(id) je generacija za keš naslova (i u drugim procesima)."""
+    __tablename__ = "bonelli_imports"
+    id = Column(Integer, primary_key=True)
+    imported_at = Column(DateTime, nullable=False)  # UTC
+    rows = Column(Integer, nullable=False)
+
+
+class ComicChange(Base):
+    """Dnevnik promena: samo kolone koje su se promenile (nove vrednosti), po URL-u i vremenu."""
+    __tablename__ = "comic_changes"
+    id = Column(Integer, primary_key=True)
+    url = Column(String(1024), nullable=False)
+    kind = Column(String(16), nullable=False)  # created / updated / deleted
+    changed_at = Column(DateTime, nullable=False)  # UTC
+    changes = Column(Text, nullable=True)  # JSON {kolona: nova vrednost}
+
+    __table_args__ = (
+        # GET /comics/changes?since= -> range scan po vremenu
+        Index("ix_comic_changes_changed_at", "changed_at", "id"),
+        Index("ix_comic_changes_url", "url"),
+    )
+
+# sirovi HTML svake preuzete strane (gzip, append-only) -> vidi `python app.py reparse`
+html_archive: Optional[HtmlArchive] = None
+_storage_lock = threading.Lock()
+
+
+def init_storage() -> HtmlArchive:
+    """Pravi šemu i otvara HTML arhivu (jednom); zove se iz lifespan-a i CLI-ja, ne pri importu."""
+    global html_archive
+    with _storage_lock:
+        if html_archive is None:
+            Base.metadata.create_all(engine)
+            html_archive = HtmlArchive(HTML_ARCHIVE_PATH)
+        return html_archive
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    init_storage()
+    yield
+
+
+app = FastAPI(title="Strip Scraper", version="0.1", lifespan=lifespan)
 
 # --- Helpers ---
 
-def get_session():
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (compatible; StripScraper/0.1; +https://example.local)"
-    })
-    return s
+# min_interval je po hostu i deli se između svih fetch niti -> SCRAPE_REQUEST_DELAY važi za ceo /scrape
+_http_client = HttpClient(
+    headers={"User-Agent": "Mozilla/5.0 (compatible; StripScraper/0.1; +https://example.local)"},
+    min_interval=SCRAPE_REQUEST_DELAY,
+)
+
+
+def get_session() -> HttpClient:
+    # jedan deljeni klijent -> keep-alive konekcije, retry i circuit breaker po hostu
+    return _http_client
 
 
+def fetch_html(session: HttpClient, url: str) -> str:
+    r = session.get(url, timeout=30)
+    # arhiviraj i greške (404/5xx), ali ih ne parsiraj -> URL ide u "failed"
+    init_storage().append_response(url, r)
+    r.raise_for_status()
+    return r.text
+
 
 def match_edition(value: str) -> Optional[Tuple[str, dict]]:
     value = (value or "").strip()
@@ -190,60 +306,13 @@ def is_issue_detail_url(u: str) -> bool:
         return False
 
 
-def normalize_issue_number(value: Optional[str]) -> Optional[str]:
-    if value is None:
-        return None
-    value = str(value).strip()
-    if not value:
-        return None
-    if value.isdigit():
-        try:
-            number = int(value)
-        except ValueError:
-            return value
-        if number == 0:
-            return None
-        return str(number)
-    return value
-
-
-def parse_title_and_broj(raw_title: str) -> Tuple[str, Optional[str]]:
-    """
-    Pokušava da izdvoji broj iz naslova, npr:
-    'Zagor 100: Naslov' -> broj='100', naslov='Zagor 100: Naslov' (ili očistiti po želji)
-    Ako je format 'Zagor #25 – ' i sl., hvata najčešće slučajeve.
-    """
-    if not raw_title:
-        return "", None
-    # Traži sekvencu broja uz reči 'br', '#', ili nakon imena serije
-    m = re.search(r'(?:(?:br\.?|#)\s*)?(\d{1,4})(?=[^\d]|$)', raw_title, flags=re.IGNORECASE)
-    # ignorisi "-30%" i slične badge-ove; izbegni brojeve odmah posle % ili '-'
-    # dozvoli formate: "Zagor 123", "Zagor #123", "br. 123", "Zagor 123: Naslov"
-    m = re.search(
-        r'(?<![%\-])\s*(?:br\.?|#)?\s*(\d{1,4})(?=[^\d]|$)',
-        raw_title,
-        flags=re.IGNORECASE
-    )
+def make_soup(html: str) -> "BeautifulSoup":
+    from bs4 import BeautifulSoup
 
-    broj = normalize_issue_number(m.group(1)) if m else None
-    return raw_title.strip(), broj
+    return BeautifulSoup(html, "html.parser")
 
-def clean_text(x: Optional[str]) -> Optional[str]:
-    if x is None:
-        return None
-    return re.sub(r'\s+', ' ', x).strip()
 
-def try_parse_date(s: str) -> Optional[datetime.date]:
-    s = (s or "").strip().strip(".")
-    s = re.sub(r"\s+", "", s)  # "23. 10. 2025." -> "23.10.2025."
-    for fmt in ("%d.%m.%Y", "%d.%m.%Y.", "%Y-%m-%d", "%d.%m.%y"):
-        try:
-            return datetime.strptime(s, fmt).date()
-        except ValueError:
-            continue
-    return None
-
-def extract_field_by_label(soup: BeautifulSoup, labels: List[str]) -> Optional[str]:
+def extract_field_by_label(soup: "BeautifulSoup", labels: List[str]) -> Optional[str]:
     """
     Na mnogo WP tema detalji su u listama (dt/dd) ili tabelama.
     Pokuša razne obrasce: <th>Label</th><td>vrednost</td>, 'Label:' bold pa tekst itd.
@@ -267,13 +336,12 @@ def extract_field_by_label(soup: BeautifulSoup, labels: List[str]) -> Optional[s
                     return clean_text(dd.get_text())
     return None
 
-def scrape_list_urls(session: requests.Session, list_url: str) -> List[Tuple[str, str]]:
+def scrape_list_urls(session: HttpClient, list_url: str) -> List[Tuple[str, str]]:
     """
     Vraća listu (title, url) sa strane edicije.
     Selektori su namerno "široki" ali ograničeni na grid sa izdanjima.
     """
-    r = session.get(list_url, timeout=30)
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = make_soup(fetch_html(session, list_url))
 
     seen: Dict[str, str] = {}
     order: List[str] = []
@@ -301,8 +369,10 @@ def scrape_list_urls(session: requests.Session, list_url: str) -> List[Tuple[str
     return [(seen[u], u) for u in order]
 
 def scrape_detail(session, url: str, default_edition_name: str) -> dict:
-    r = session.get(url, timeout=30)
-    soup = BeautifulSoup(r.text, "html.parser")
+    return parse_detail(fetch_html(session, url), default_edition_name)
+
+def parse_detail(html: str, default_edition_name: str) -> dict:
+    soup = make_soup(html)
 
     # ---------- NASLOV + BROJ ----------
     # Uzmemo <h1> i odsečemo "Zagor <broj>" deo iz njega.
@@ -382,11 +452,47 @@ def scrape_detail(session, url: str, default_edition_name: str) -> dict:
         "edicija": edicija or default_edition_name
     }
 
-def upsert_comic(db, data: dict):
+def _change_value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def comic_snapshot(obj: Comic) -> dict:
+    return {column: getattr(obj, column) for column in COMIC_TRACKED_COLUMNS}
+
+
+def comic_change_values(url: str, before: Optional[dict], after: Optional[dict]) -> Optional[dict]:
+    """Vrednosti za red u comic_changes, ili None ako se ništa nije promenilo."""
+    if after is None:
+        kind, changes = "deleted", None
+    elif before is None:
+        kind = "created"
+        changes = {column: value for column, value in after.items() if value is not None}
+    else:
+        kind = "updated"
+        changes = {column: value for column, value in after.items() if before.get(column) != value}
+        if not changes:
+            return None
+    return {
+        "url": url,
+        "kind": kind,
+        "changed_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        "changes": json.dumps({k: _change_value(v) for k, v in changes.items()}, ensure_ascii=False) if changes else None,
+    }
+
+
+def record_comic_change(db, url: str, before: Optional[dict], after: Optional[dict]) -> None:
+    """Dodaje red u comic_changes u istoj sesiji (isti batch/commit kao upsert); bez razlike nema reda."""
+    values = comic_change_values(url, before, after)
+    if values is not None:
+        db.add(ComicChange(**values))
+
+
+def upsert_comic(db, data: dict, commit: bool = True):
     # upsert po URL-u
     url = data["url"]
     stmt = select(Comic).where(Comic.url == url)
     obj = db.execute(stmt).scalar_one_or_none()
+    before = comic_snapshot(obj) if obj is not None else None
     if obj is None:
         obj = Comic(
             edicija=data.get("edicija") or DEFAULT_EDICIJA,
@@ -410,7 +516,443 @@ def upsert_comic(db, data: dict):
         obj.opis = data.get("opis") or obj.opis
         obj.izdavac = data.get("izdavac") or obj.izdavac
 
-    db.commit()
+    record_comic_change(db, url, before, comic_snapshot(obj))
+    if commit:
+        db.commit()
+
+
+def build_comic_row(url: str, detail: dict, edition_name: str, title_from_list: str = "") -> dict:
+    fallback_title, fallback_broj = parse_title_and_broj(title_from_list or "")
+    if fallback_title and not any(ch.isalpha() for ch in fallback_title):
+        fallback_title = ""
+    detail_broj = normalize_issue_number(detail.get("broj"))
+    fallback_broj = normalize_issue_number(fallback_broj)
+    return {
+        "edicija": detail.get("edicija") or edition_name,
+        "naslov": detail.get("page_title") or fallback_title or "",
+        "broj": detail_broj or fallback_broj,
+        "url": url,
+        "datum_objavljivanja": detail.get("datum_objavljivanja"),
+        "broj_originala": detail.get("broj_originala"),
+        "naslov_originala": detail.get("naslov_originala"),
+        "opis": detail.get("opis"),
+        "izdavac": detail.get("izdavac") or DEFAULT_IZDAVAC,
+    }
+
+
+def parse_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    # spawn: bezbedno i kad se poziva iz niti uvicorn servera
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _parse_detail_task(task: Tuple[str, str, str]) -> Tuple[str, dict]:
+    url, html, default_edition_name = task
+    return url, parse_detail(html, default_edition_name)
+
+
+def _reparse_page(task: Tuple[str, bytes, Optional[str], str]) -> Tuple[str, dict]:
+    # radi u child procesu: dekompresija + BeautifulSoup su CPU posao
+    url, blob, encoding, default_edition_name = task
+    return url, parse_detail(decode_body(decompress(blob), encoding), default_edition_name)
+
+
+_DONE = object()
+
+
+def scrape_pipeline(
+    session: HttpClient,
+    pairs: List[Tuple[str, str]],
+    edition_name: str,
+    fetch_workers: int = SCRAPE_FETCH_WORKERS,
+    parse_workers: int = SCRAPE_PARSE_WORKERS,
+    queue_size: int = SCRAPE_QUEUE_SIZE,
+    batch_size: int = SCRAPE_BATCH_SIZE,
+) -> Tuple[List[dict], List[Tuple[str, str]]]:
+    """
+    Fetch -> parse -> write pipeline za detalj strane.
+
+    * fetch: `fetch_workers` niti skida HTML u ograničeni red (backpressure),
+    * parse: `ProcessPoolExecutor` sa `parse_workers` procesa (BeautifulSoup je CPU posao),
+    * write: jedan writer (pozivalac) radi upsert u batch-evima od `batch_size`.
+
+    Vraća (upisani redovi, [(url, greška)]).
+    """
+    fetch_workers = max(1, min(fetch_workers, len(pairs) or 1))
+    parse_workers = max(1, parse_workers)
+    todo: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+    for pair in pairs:
+        todo.put(pair)
+    html_q: queue.Queue = queue.Queue(maxsize=max(queue_size, 1))
+    # ograničen broj poslova u procesima -> dispatcher staje kad writer kasni
+    parsed_q: queue.Queue = queue.Queue(maxsize=parse_workers * 2)
+    failures: List[Tuple[str, str]] = []
+    failures_lock = threading.Lock()
+    # writer pao (npr. SQLite lock) -> svi stage-ovi izlaze umesto da vise na punim redovima
+    stop = threading.Event()
+
+    def put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=SCRAPE_QUEUE_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetcher() -> None:
+        while not stop.is_set():
+            try:
+                title_from_list, url = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                html = fetch_html(session, url)
+            except Exception as exc:
+                with failures_lock:
+                    failures.append((url, str(exc)))
+            else:
+                if not put(html_q, (title_from_list, url, html)):
+                    return
+
+    def fetch_stage() -> None:
+        threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetch_workers)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            put(html_q, _DONE)
+
+    def dispatch_stage(pool: ProcessPoolExecutor) -> None:
+        try:
+            while not stop.is_set():
+                try:
+                    item = html_q.get(timeout=SCRAPE_QUEUE_POLL)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    return
+                title_from_list, url, html = item
+                future = pool.submit(_parse_detail_task, (url, html, edition_name))
+                if not put(parsed_q, (title_from_list, url, future)):
+                    future.cancel()
+                    return
+        finally:
+            put(parsed_q, _DONE)
+
+    rows: List[dict] = []
+    with parse_pool(parse_workers) as pool, SessionLocal() as db:
+        stages = [
+            threading.Thread(target=fetch_stage, daemon=True),
+            threading.Thread(target=dispatch_stage, args=(pool,), daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+        try:
+            pending = 0
+            while True:
+                item = parsed_q.get()
+                if item is _DONE:
+                    break
+                title_from_list, url, future = item
+                try:
+                    _, detail = future.result()
+                except Exception as exc:
+                    with failures_lock:
+                        failures.append((url, str(exc)))
+                    continue
+                row = build_comic_row(url, detail, edition_name, title_from_list)
+                upsert_comic(db, row, commit=False)
+                rows.append(row)
+                pending += 1
+                if pending >= batch_size:
+                    db.commit()
+                    pending = 0
+            db.commit()
+        finally:
+            stop.set()
+            for stage in stages:
+                stage.join()
+            # parse poslovi koji nisu stigli do writera
+            while True:
+                try:
+                    item = parsed_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _DONE:
+                    item[2].cancel()
+    return rows, failures
+
+
+def reparse_archive(workers: Optional[int] = None, batch_size: int = REPARSE_BATCH_SIZE) -> int:
+    """
+    Ponovo izvlači polja iz poslednje arhivirane verzije svake detalj strane
+    (bez mreže) i masovno ažurira comics.db. Vraća broj ažuriranih zapisa.
+    """
+    with SessionLocal() as db:
+        editions = dict(db.execute(select(Comic.url, Comic.edicija)).all())
+
+    def tasks() -> Iterable[Tuple[str, bytes, Optional[str], str]]:
+        for page in init_storage().latest():
+            if not is_issue_detail_url(page.url):
+                continue
+            yield page.url, page.compressed, page.encoding, editions.get(page.url) or DEFAULT_EDICIJA
+
+    updated = 0
+    with parse_pool(workers) as pool, SessionLocal() as db:
+        for url, detail in pool.map(_reparse_page, tasks(), chunksize=8):
+            row = build_comic_row(url, detail, editions.get(url) or DEFAULT_EDICIJA)
+            upsert_comic(db, row, commit=False)
+            updated += 1
+            if updated % batch_size == 0:
+                db.commit()
+        db.commit()
+    return updated
+
+def bonelli_row_to_values(row: dict) -> Optional[dict]:
+    url = (row.get("url") or "").strip()
+    if not url:
+        return None
+    tags = {
+        key: value
+        for key, value in row.items()
+        if key and key not in BONELLI_BASE_COLUMNS and key not in ("Broj", "Uscita") and value
+    }
+    return {
+        "series": clean_text(row.get("series")) or "",
+        "issue_no": normalize_issue_number(row.get("Broj")),
+        "title": clean_text(row.get("title")) or "",
+        "url": url,
+        "release": clean_text(row.get("Uscita")),
+        "tags": json.dumps(tags, ensure_ascii=False) if tags else None,
+    }
+
+
+def load_bonelli_rows(rows: Iterable[dict], batch_size: int = BONELLI_IMPORT_BATCH_SIZE) -> int:
+    """
+    Masovni upis Bonelli redova (CSV kolone: series, title, url, Broj, Uscita, ...)
+    u bonelli_issues: executemany INSERT .. ON CONFLICT(url) DO UPDATE po batch-u, ceo import
+    (i red u bonelli_imports) u jednoj transakciji -> ili sve ili ništa. Vraća broj obrađenih redova.
+    """
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+    table = BonelliIssue.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.url],
+        set_={name: stmt.excluded[name] for name in ("series", "issue_no", "title", "release", "tags")},
+    )
+    loaded = 0
+    batch: List[dict] = []
+    with engine.begin() as conn:
+        for row in rows:
+            values = bonelli_row_to_values(row)
+            if values is None:
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                conn.execute(stmt, batch)
+                loaded += len(batch)
+                batch = []
+        if batch:
+            conn.execute(stmt, batch)
+            loaded += len(batch)
+        # ista transakcija: ko vidi nove redove, vidi i novu generaciju
+        conn.execute(
+            BonelliImport.__table__.insert(),
+            {"imported_at": datetime.now(timezone.utc).replace(tzinfo=None), "rows": loaded},
+        )
+    return loaded
+
+
+def iter_comics_dump() -> Iterator[bytes]:
+    """Ceo katalog kao gzip NDJSON (jedan strip po redu), u delovima -> bez učitavanja svega u memoriju."""
+    compressor = zlib.compressobj(DUMP_GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31 -> gzip omotač
+    columns = [Comic.__table__.c.url, *(Comic.__table__.c[name] for name in COMIC_TRACKED_COLUMNS)]
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=COMICS_DUMP_FETCH_SIZE).execute(
+            select(*columns).order_by(Comic.id)
+        )
+        for rows in result.mappings().partitions():
+            lines = "".join(
+                json.dumps({key: _change_value(value) for key, value in row.items()}, ensure_ascii=False) + "\n"
+                for row in rows
+            )
+            chunk = compressor.compress(lines.encode("utf-8"))
+            if chunk:
+                yield chunk
+    yield compressor.flush()
+
+
+def iter_ndjson_records(stream: BinaryIO) -> Iterator[Optional[dict]]:
+    """Redovi iz NDJSON toka (gzip ili običnog); None za red koji nije JSON objekat."""
+    if stream.read(2) == b"\x1f\x8b":
+        stream.seek(0)
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    else:
+        stream.seek(0)
+    for line in io.TextIOWrapper(stream, encoding="utf-8-sig"):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield record if isinstance(record, dict) else None
+
+
+def comic_record_to_values(record: Optional[dict]) -> Optional[dict]:
+    url = ((record or {}).get("url") or "").strip()
+    if not url:
+        return None
+    try:
+        release = record.get("datum_objavljivanja")
+        release_date = date.fromisoformat(release) if release else None
+    except (TypeError, ValueError):
+        return None
+    values = {column: record.get(column) for column in COMIC_TRACKED_COLUMNS}
+    values.update(
+        url=url,
+        edicija=values["edicija"] or DEFAULT_EDICIJA,
+        naslov=values["naslov"] or "",
+        datum_objavljivanja=release_date,
+        izdavac=values["izdavac"] or DEFAULT_IZDAVAC,
+    )
+    return values
+
+
+def _load_comics_batch(conn, stmt, batch: List[dict]) -> None:
+    table = Comic.__table__
+    existing = {
+        row["url"]: {column: row[column] for column in COMIC_TRACKED_COLUMNS}
+        for row in conn.execute(select(table).where(table.c.url.in_([v["url"] for v in batch]))).mappings()
+    }
+    conn.execute(stmt, batch)
+    changes = []
+    for values in batch:
+        after = {column: values[column] for column in COMIC_TRACKED_COLUMNS}
+        change = comic_change_values(values["url"], existing.get(values["url"]), after)
+        if change is not None:
+            changes.append(change)
+    if changes:
+        conn.execute(ComicChange.__table__.insert(), changes)
+
+
+def load_comic_records(records: Iterable[Optional[dict]], batch_size: int = COMICS_LOAD_BATCH_SIZE) -> Tuple[int, int]:
+    """
+    Učitava dump (vidi iter_comics_dump): INSERT .. ON CONFLICT(url) DO UPDATE po batch-u,
+    svaki batch u svojoj transakciji zajedno sa redovima dnevnika promena.
+    Vrednosti iz dump-a prepisuju postojeće. Vraća (učitano, preskočeno).
+    """
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+    table = Comic.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.url],
+        set_={name: stmt.excluded[name] for name in COMIC_TRACKED_COLUMNS},
+    )
+    loaded = skipped = 0
+    batch: List[dict] = []
+    for record in records:
+        values = comic_record_to_values(record)
+        if values is None:
+            skipped += 1
+            continue
+        batch.append(values)
+        if len(batch) >= batch_size:
+            with engine.begin() as conn:
+                _load_comics_batch(conn, stmt, batch)
+            loaded += len(batch)
+            batch = []
+    if batch:
+        with engine.begin() as conn:
+            _load_comics_batch(conn, stmt, batch)
+        loaded += len(batch)
+    return loaded, skipped
+
+
+class TitleLookup:
+    """
+    Trigram indeks naslova za /comics/similar: comics.naslov, comics.naslov_originala i
+    bonelli_issues.title. Stripovi se osvežavaju inkrementalno iz comic_changes, a Bonelli
+    katalog se gradi ponovo posle svakog importa (nova generacija u bonelli_imports), pa i
+    kad import uradi drugi worker ili CLI.
+    """
+
+    def __init__(self) -> None:
+        self.comics = TrigramIndex()
+        self.bonelli = TrigramIndex()
+        self._lock = threading.Lock()
+        self._last_change_id: Optional[int] = None
+        self._comic_ids: Dict[str, int] = {}
+        self._bonelli_generation: Optional[int] = None
+
+    def _index_comics(self, db, urls: Optional[List[str]] = None) -> None:
+        stmt = select(Comic.id, Comic.url, Comic.naslov, Comic.naslov_originala)
+        if urls is not None:
+            stmt = stmt.where(Comic.url.in_(urls))
+        for comic_id, url, naslov, naslov_originala in db.execute(stmt):
+            self._comic_ids[url] = comic_id
+            self.comics.add((comic_id, "naslov"), naslov or "")
+            self.comics.add((comic_id, "naslov_originala"), naslov_originala or "")
+
+    def _forget_comic(self, url: str) -> None:
+        comic_id = self._comic_ids.pop(url, None)
+        if comic_id is not None:
+            self.comics.remove((comic_id, "naslov"))
+            self.comics.remove((comic_id, "naslov_originala"))
+
+    def _refresh_comics(self, db) -> None:
+        last_change_id = db.execute(select(func.max(ComicChange.id))).scalar() or 0
+        if self._last_change_id is None:
+            self._index_comics(db)
+        elif last_change_id > self._last_change_id:
+            changed = db.execute(
+                select(ComicChange.url, ComicChange.kind)
+                .where(ComicChange.id > self._last_change_id, ComicChange.id <= last_change_id)
+                .order_by(ComicChange.id)
+            ).all()
+            for url, _kind in changed:
+                self._forget_comic(url)
+            urls = list({url for url, _kind in changed})
+            for start in range(0, len(urls), COMICS_LOAD_BATCH_SIZE):
+                self._index_comics(db, urls[start:start + COMICS_LOAD_BATCH_SIZE])
+        self._last_change_id = last_change_id
+
+    def _refresh_bonelli(self, db) -> None:
+        generation = db.execute(select(func.max(BonelliImport.id))).scalar() or 0
+        if generation == self._bonelli_generation:
+            return
+        self.bonelli = TrigramIndex()
+        for issue_id, title in db.execute(select(BonelliIssue.id, BonelliIssue.title)):
+            self.bonelli.add((issue_id, "title"), title or "")
+        self._bonelli_generation = generation
+
+    def search(self, db, title: str, limit: int, min_score: float, source: str) -> List[Tuple[str, int, str, float]]:
+        """Vraća [(izvor, id, polje, skor)], najbolji prvi, jedan pogodak po zapisu."""
+        with self._lock:
+            self._refresh_comics(db)
+            self._refresh_bonelli(db)
+            hits = []
+            if source in ("all", "comic"):
+                # do 2 ključa po stripu (naslov i naslov_originala) -> uzmi duplo kandidata
+                hits += [("comic", key, score) for key, score in self.comics.search(title, limit * 2, min_score)]
+            if source in ("all", "bonelli"):
+                hits += [("bonelli", key, score) for key, score in self.bonelli.search(title, limit, min_score)]
+        hits.sort(key=lambda hit: hit[2], reverse=True)
+        best: Dict[Tuple[str, int], Tuple[str, int, str, float]] = {}
+        for kind, (record_id, field), score in hits:
+            if (kind, record_id) not in best:
+                best[(kind, record_id)] = (kind, record_id, field, round(score, 3))
+        return list(best.values())[:limit]
+
+
+title_lookup = TitleLookup()
+
 
 # --- API ---
 
@@ -437,7 +979,10 @@ def run_scrape(payload: Optional[dict] = Body(default=None)):
 
     session = get_session()
     list_url = with_per_page(edition_cfg["list_url"], per_page_value)
-    pairs = scrape_list_urls(session, list_url)  # [(title, url)]
+    try:
+        pairs = scrape_list_urls(session, list_url)  # [(title, url)]
+    except requests.HTTPError as exc:
+        raise HTTPException(502, f"List stranica nije dostupna: {exc}")
     per_page_effective: Optional[int] = per_page_value
     if per_page_effective is None:
         query_params = dict(parse_qsl(urlparse(list_url).query, keep_blank_values=True))
@@ -447,44 +992,30 @@ def run_scrape(payload: Optional[dict] = Body(default=None)):
     if not pairs:
         raise HTTPException(502, "Nisam prona\u0161ao nijedan strip na list stranici (promenjen HTML?).")
 
-    imported = 0
-    details = []
-    with SessionLocal() as db:
-        for title_from_list, url in pairs:
-            time.sleep(0.6)
-            detail = scrape_detail(session, url, edition_cfg["name"])
-            fallback_title, fallback_broj = parse_title_and_broj(title_from_list or "")
-            if fallback_title and not any(ch.isalpha() for ch in fallback_title):
-                fallback_title = ""
-            detail_broj = normalize_issue_number(detail.get("broj"))
-            fallback_broj = normalize_issue_number(fallback_broj)
-            broj = detail_broj or fallback_broj
-            naslov = detail.get("page_title") or fallback_title or ""
-            row = {
-                "edicija": detail.get("edicija") or edition_cfg["name"],
-                "naslov": naslov,
-                "broj": broj,
-                "url": url,
-                "datum_objavljivanja": detail.get("datum_objavljivanja"),
-                "broj_originala": detail.get("broj_originala"),
-                "naslov_originala": detail.get("naslov_originala"),
-                "opis": detail.get("opis"),
-                "izdavac": detail.get("izdavac") or DEFAULT_IZDAVAC,
-            }
-            upsert_comic(db, row)
-            imported += 1
-            details.append({"naslov": row["naslov"], "url": url})
+    rows, failures = scrape_pipeline(session, pairs, edition_cfg["name"])
+    details = [{"naslov": row["naslov"], "url": row["url"]} for row in rows]
     return {
         "edition_slug": edition_slug,
         "edition_name": edition_cfg["name"],
         "per_page": per_page_effective,
         "list_url": list_url,
         "found": len(pairs),
-        "imported_or_updated": imported,
+        "imported_or_updated": len(rows),
+        "failed": [{"url": url, "error": error} for url, error in failures],
         "sample": details[:5],
     }
 
 
+@app.post("/bonelli/import")
+def import_bonelli(file: UploadFile = File(...)):
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    if not reader.fieldnames or "url" not in reader.fieldnames:
+        raise HTTPException(400, "CSV mora imati kolone series, title, url (izlaz bonneli_scrape.py).")
+    loaded = load_bonelli_rows(reader)
+    return {"imported_or_updated": loaded}
+
+
 @app.get("/comics")
 def list_comics(edition_param: Optional[str] = Query(None, alias="edicija")):
     edition_filter = resolve_optional_edition(edition_param)
@@ -512,6 +1043,103 @@ def list_comics(edition_param: Optional[str] = Query(None, alias="edicija")):
         return comics
 
 
+@app.get("/comics/dump")
+def dump_comics():
+    filename = f"comics_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.ndjson.gz"
+    return StreamingResponse(
+        iter_comics_dump(),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/comics/load")
+def load_comics(file: UploadFile = File(...)):
+    loaded, skipped = load_comic_records(iter_ndjson_records(file.file))
+    return {"imported_or_updated": loaded, "skipped": skipped}
+
+
+@app.get("/comics/similar")
+def similar_titles(
+    title: str = Query(..., min_length=1, description="Naslov (srpski ili italijanski); dijakritici i interpunkcija se ignorišu"),
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(DEFAULT_MIN_SCORE, ge=0.0, le=1.0),
+    source: str = Query("all", pattern="^(all|comic|bonelli)$", description="all, comic ili bonelli"),
+):
+    with SessionLocal() as db:
+        hits = title_lookup.search(db, title, limit=limit, min_score=min_score, source=source)
+        comic_ids = [record_id for kind, record_id, _, _ in hits if kind == "comic"]
+        bonelli_ids = [record_id for kind, record_id, _, _ in hits if kind == "bonelli"]
+        comics = {c.id: c for c in db.execute(select(Comic).where(Comic.id.in_(comic_ids))).scalars()} if comic_ids else {}
+        issues = {
+            b.id: b for b in db.execute(select(BonelliIssue).where(BonelliIssue.id.in_(bonelli_ids))).scalars()
+        } if bonelli_ids else {}
+
+        results = []
+        for kind, record_id, field, score in hits:
+            if kind == "comic" and record_id in comics:
+                c = comics[record_id]
+                results.append({
+                    "source": kind,
+                    "score": score,
+                    "matched": field,
+                    "url": c.url,
+                    "edicija": c.edicija,
+                    "naslov": c.naslov,
+                    "broj": c.broj,
+                    "naslov_originala": c.naslov_originala,
+                    "broj_originala": c.broj_originala,
+                })
+            elif kind == "bonelli" and record_id in issues:
+                b = issues[record_id]
+                results.append({
+                    "source": kind,
+                    "score": score,
+                    "matched": field,
+                    "url": b.url,
+                    "series": b.series,
+                    "title": b.title,
+                    "issue_no": b.issue_no,
+                })
+        return results
+
+
+@app.get("/comics/changes")
+def list_comic_changes(
+    since: str = Query(..., description="ISO datum/vreme (bez zone = UTC); vraća promene posle njega"),
+    after_id: Optional[int] = Query(None, description="Nastavak strane: id poslednje promene sa vremenom `since`"),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=CHANGES_MAX_PAGE_SIZE),
+):
+    try:
+        since_dt = datetime.fromisoformat(since.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(400, "Parametar since mora biti ISO datum ili vreme.")
+    if since_dt.tzinfo is not None:
+        since_dt = since_dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+    newer = ComicChange.changed_at > since_dt
+    if after_id is not None:
+        newer = or_(newer, and_(ComicChange.changed_at == since_dt, ComicChange.id > after_id))
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(ComicChange).where(newer).order_by(ComicChange.changed_at, ComicChange.id).limit(limit)
+        ).scalars().all()
+
+    changes = [
+        {
+            "id": r.id,
+            "url": r.url,
+            "kind": r.kind,
+            "changed_at": r.changed_at.replace(tzinfo=timezone.utc).isoformat(),
+            "changes": json.loads(r.changes) if r.changes else None,
+        }
+        for r in rows
+    ]
+    # sledeća strana: since=<changed_at poslednjeg>&after_id=<id poslednjeg>
+    next_page = {"since": changes[-1]["changed_at"], "after_id": changes[-1]["id"]} if len(changes) == limit else None
+    return {"changes": changes, "next": next_page}
+
+
 @app.get("/export.xlsx")
 def export_excel(edition_param: Optional[str] = Query(None, alias="edicija")):
     edition_filter = resolve_optional_edition(edition_param)
@@ -542,6 +1170,9 @@ def export_excel(edition_param: Optional[str] = Query(None, alias="edicija")):
         if not data:
             return JSONResponse({"detail": "Za tra\u017eenu ediciju nema zapisa u bazi."}, status_code=404)
 
+        import pandas as pd
+        from slugify import slugify
+
         df = pd.DataFrame(
             data,
             columns=[
@@ -591,9 +1222,13 @@ def delete_comic(
             delete(Comic)
             .where(Comic.edicija == edition_name)
         )
+        urls_stmt = select(Comic.url).where(Comic.edicija == edition_name)
         if not delete_all:
             stmt = stmt.where(Comic.broj == broj_normalized)
+            urls_stmt = urls_stmt.where(Comic.broj == broj_normalized)
 
+        for url in db.execute(urls_stmt).scalars():
+            record_comic_change(db, url, None, None)
         result = db.execute(stmt)
         deleted_count = result.rowcount or 0
         db.commit()
@@ -606,3 +1241,43 @@ def delete_comic(
         "edicija": edition_name,
         "broj": "*" if delete_all else broj_normalized,
     }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Strip Scraper - komande za rad sa bazom bez servera.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reparse = commands.add_parser("reparse", help="Ponovo parsira arhivirani HTML i ažurira comics.db.")
+    reparse.add_argument("--workers", type=int, default=None, help="Broj procesa (podrazumevano: broj jezgara).")
+    reparse.add_argument("--batch-size", type=int, default=REPARSE_BATCH_SIZE, help="Broj zapisa po transakciji.")
+    bonelli = commands.add_parser("import-bonelli", help="Učitava Bonelli katalog (CSV iz bonneli_scrape.py) u comics.db.")
+    bonelli.add_argument("csv_path", help="Putanja do CSV fajla.")
+    bonelli.add_argument("--batch-size", type=int, default=BONELLI_IMPORT_BATCH_SIZE, help="Broj redova po batch-u.")
+    dump = commands.add_parser("dump", help="Snima ceo katalog kao gzip NDJSON (isto kao GET /comics/dump).")
+    dump.add_argument("out_path", help="Izlazni fajl, npr. comics.ndjson.gz.")
+    load = commands.add_parser("load", help="Učitava NDJSON dump (gzip ili običan) u comics.db.")
+    load.add_argument("in_path", help="Putanja do dump fajla.")
+    load.add_argument("--batch-size", type=int, default=COMICS_LOAD_BATCH_SIZE, help="Broj redova po transakciji.")
+    args = parser.parse_args(argv)
+    init_storage()
+
+    if args.command == "reparse":
+        updated = reparse_archive(workers=args.workers, batch_size=max(args.batch_size, 1))
+        print(f"Ažurirano {updated} zapisa iz arhive {HTML_ARCHIVE_PATH}.")
+    elif args.command == "import-bonelli":
+        with open(args.csv_path, "r", encoding="utf-8-sig", newline="") as handle:
+            loaded = load_bonelli_rows(csv.DictReader(handle), batch_size=max(args.batch_size, 1))
+        print(f"Učitano {loaded} Bonelli zapisa iz {args.csv_path}.")
+    elif args.command == "dump":
+        with open(args.out_path, "wb") as handle:
+            for chunk in iter_comics_dump():
+                handle.write(chunk)
+        print(f"Katalog snimljen u {args.out_path}.")
+    elif args.command == "load":
+        with open(args.in_path, "rb") as handle:
+            loaded, skipped = load_comic_records(iter_ndjson_records(handle), batch_size=max(args.batch_size, 1))
+        print(f"Učitano {loaded} zapisa iz {args.in_path} (preskočeno {skipped}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,13 +5,14 @@ from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
-from app import EDITIONS, app as api_app
+from app import EDITIONS, app as api_app, lifespan
 
 
 BASE_DIR = Path(__file__).resolve().parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
-web_app = FastAPI(title="Strip Scraper UI", version="0.1")
+# mounted apps don't get their own lifespan events, so run the API's here
+web_app = FastAPI(title="Strip Scraper UI", version="0.1", lifespan=lifespan)
 web_app.mount("/api", api_app)
 
 
@@ -1,7 +1,8 @@
+import os
 import re
+import sys
 import time
 import io
-import requests
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
@@ -14,6 +15,10 @@ from sqlalchemy.orm import declarative_base, sessionmaker
 import pandas as pd
 from slugify import slugify
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "shared"))
+from http_client import HttpClient  # noqa: E402
+from text_normalize import clean_text, normalize_issue_number, parse_title_and_broj, try_parse_date  # noqa: E402
+
 
 BASE_URL = "https://veselicetvrtak.com"
 EDITIONS = {
@@ -68,12 +73,14 @@ app = FastAPI(title="Strip Scraper", version="0.1")
 
 # --- Helpers ---
 
-def get_session():
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (compatible; StripScraper/0.1; +https://example.local)"
-    })
-    return s
+_http_client = HttpClient(headers={
+    "User-Agent": "Mozilla/5.0 (compatible; StripScraper/0.1; +https://example.local)"
+})
+
+
+def get_session() -> HttpClient:
+    # jedan deljeni klijent -> keep-alive konekcije, retry i circuit breaker po hostu
+    return _http_client
 
 
 
@@ -143,59 +150,6 @@ def is_issue_detail_url(u: str) -> bool:
         return False
 
 
-def normalize_issue_number(value: Optional[str]) -> Optional[str]:
-    if value is None:
-        return None
-    value = str(value).strip()
-    if not value:
-        return None
-    if value.isdigit():
-        try:
-            number = int(value)
-        except ValueError:
-            return value
-        if number == 0:
-            return None
-        return str(number)
-    return value
-
-
-def parse_title_and_broj(raw_title: str) -> Tuple[str, Optional[str]]:
-    """
-    Pokušava da izdvoji broj iz naslova, npr:
-    'Zagor 100: Naslov' -> broj='100', naslov='Zagor 100: Naslov' (ili očistiti po želji)
-    Ako je format 'Zagor #25 – ' i sl., hvata najčešće slučajeve.
-    """
-    if not raw_title:
-        return "", None
-    # Traži sekvencu broja uz reči 'br', '#', ili nakon imena serije
-    m = re.search(r'(?:(?:br\.?|#)\s*)?(\d{1,4})(?=[^\d]|$)', raw_title, flags=re.IGNORECASE)
-    # ignorisi "-30%" i slične badge-ove; izbegni brojeve odmah posle % ili '-'
-    # dozvoli formate: "Zagor 123", "Zagor #123", "br. 123", "Zagor 123: Naslov"
-    m = re.search(
-        r'(?<![%\-])\s*(?:br\.?|#)?\s*(\d{1,4})(?=[^\d]|$)',
-        raw_title,
-        flags=re.IGNORECASE
-    )
-
-    broj = normalize_issue_number(m.group(1)) if m else None
-    return raw_title.strip(), broj
-
-def clean_text(x: Optional[str]) -> Optional[str]:
-    if x is None:
-        return None
-    return re.sub(r'\s+', ' ', x).strip()
-
-def try_parse_date(s: str) -> Optional[datetime.date]:
-    s = (s or "").strip().strip(".")
-    s = re.sub(r"\s+", "", s)  # "23. 10. 2025." -> "23.10.2025."
-    for fmt in ("%d.%m.%Y", "%d.%m.%Y.", "%Y-%m-%d", "%d.%m.%y"):
-        try:
-            return datetime.strptime(s, fmt).date()
-        except ValueError:
-            continue
-    return None
-
 def extract_field_by_label(soup: BeautifulSoup, labels: List[str]) -> Optional[str]:
     """
     Na mnogo WP tema detalji su u listama (dt/dd) ili tabelama.
@@ -220,7 +174,7 @@ def extract_field_by_label(soup: BeautifulSoup, labels: List[str]) -> Optional[s
                     return clean_text(dd.get_text())
     return None
 
-def scrape_list_urls(session: requests.Session, list_url: str) -> List[Tuple[str, str]]:
+def scrape_list_urls(session: HttpClient, list_url: str) -> List[Tuple[str, str]]:
     """
     Vraća listu (title, url) sa strane edicije.
     Selektori su namerno "široki" ali ograničeni na grid sa izdanjima.